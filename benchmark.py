@@ -0,0 +1,154 @@
+"""
+Runs the crawl pipelines against a local mock_site.py server and reports
+pages/s, members/s, peak RSS and wall time for each, so performance changes
+show up as numbers instead of impressions.
+
+    python benchmark.py --members 300 --latency 0.05 --error-rate 0.02
+    python benchmark.py --pipelines all --engine http --json bench.json
+
+Every pipeline runs as its own process in a fresh temporary folder with the
+page cache off, so runs do not share state.
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from mock_site import MockSite, base_url, start_mock_site
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINES = {
+    "all": "all.py",
+    "bychapter": "byChapterName.py",
+    "index": "index.py",
+}
+# Files the scripts write next to their output that are not member rows
+NON_MEMBER_FILES = {"wait_times.csv"}
+
+
+def count_output_rows(folder):
+    """Counts the data rows of every member CSV the pipeline wrote under `folder`."""
+    rows = 0
+    for directory, _, file_names in os.walk(folder):
+        for file_name in file_names:
+            if not file_name.endswith(".csv") or file_name in NON_MEMBER_FILES:
+                continue
+            with open(os.path.join(directory, file_name), 'r', newline='', encoding='utf-8') as f:
+                rows += max(0, sum(1 for _ in csv.reader(f)) - 1)
+    return rows
+
+
+def run_pipeline(name, script, site, server, options):
+    """Runs one pipeline to completion (or timeout) and returns its measurements."""
+    workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    env = dict(
+        os.environ,
+        BNI_BASE_URL=base_url(server),
+        BNI_CACHE="0",
+        BNI_HEADLESS="1",
+        BNI_ENGINE=options.engine,
+        BNI_CONCURRENCY=str(options.concurrency),
+        BNI_ALLOWED_DOMAINS="127.0.0.1",
+    )
+    served_before = dict(site.served)
+    errors_before = site.errors
+    bytes_before = site.bytes_sent
+
+    log_path = os.path.join(workdir, "benchmark.log")
+    with open(log_path, 'w', encoding='utf-8') as log:
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, script)],
+                                   cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        timer = threading.Timer(options.timeout, process.kill)
+        timer.start()
+        # wait4 gives the resource usage of this child alone
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - started
+        timer.cancel()
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+    served = {page_type: count - served_before.get(page_type, 0) for page_type, count in site.served.items()}
+    pages = sum(count for page_type, count in served.items() if page_type != "asset")
+    members = count_output_rows(workdir)
+    result = {
+        "pipeline": name,
+        "engine": options.engine,
+        "exit_code": process.returncode,
+        "wall_seconds": round(wall, 2),
+        "pages": pages,
+        "pages_by_type": served,
+        "members": members,
+        "pages_per_second": round(pages / wall, 2) if wall else 0.0,
+        "members_per_second": round(members / wall, 2) if wall else 0.0,
+        # Linux reports ru_maxrss in KiB: the largest process of the pipeline's tree
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "errors_injected": site.errors - errors_before,
+        "bytes_served": site.bytes_sent - bytes_before,
+        "log": log_path,
+    }
+    if options.keep:
+        result["workdir"] = workdir
+    else:
+        shutil.copy(log_path, os.path.join(tempfile.gettempdir(), f"bench_{name}.log"))
+        result["log"] = os.path.join(tempfile.gettempdir(), f"bench_{name}.log")
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def print_results(results):
+    print(f"{'pipeline':<10} {'exit':>4} {'wall s':>8} {'pages':>6} {'pages/s':>8} "
+          f"{'members':>7} {'members/s':>9} {'RSS MB':>7} {'errors':>6}")
+    for result in results:
+        print(f"{result['pipeline']:<10} {result['exit_code']:>4} {result['wall_seconds']:>8.2f} "
+              f"{result['pages']:>6} {result['pages_per_second']:>8.2f} {result['members']:>7} "
+              f"{result['members_per_second']:>9.2f} {result['peak_rss_mb']:>7.1f} {result['errors_injected']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the crawl pipelines against a local mock BNI site.")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES),
+                        help=f"comma separated subset of {', '.join(PIPELINES)}")
+    parser.add_argument("--members", type=int, default=200, help="members on the mock site")
+    parser.add_argument("--latency", type=float, default=0.0, help="average seconds the mock adds to each page")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of pages answered with 503")
+    parser.add_argument("--page-size", type=int, default=100, help="memberlist rows per page on the mock site")
+    parser.add_argument("--engine", choices=["browser", "http"], default="browser",
+                        help="BNI_ENGINE for the pipelines that support it")
+    parser.add_argument("--concurrency", type=int, default=4, help="BNI_CONCURRENCY for the pipelines")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds before a pipeline is killed")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--keep", action="store_true", help="keep the pipelines' working folders")
+    options = parser.parse_args()
+
+    names = [name.strip() for name in options.pipelines.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PIPELINES]
+    if unknown:
+        parser.error(f"unknown pipelines: {', '.join(unknown)}")
+
+    site = MockSite(options.members, options.latency, options.error_rate, page_size=options.page_size)
+    server = start_mock_site(site)
+    print(f"Mock site with {options.members} members at {base_url(server)}")
+    results = []
+    try:
+        for name in names:
+            print(f"Running {name} ...")
+            results.append(run_pipeline(name, PIPELINES[name], site, server, options))
+    finally:
+        server.shutdown()
+
+    print_results(results)
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as f:
+            json.dump({"members": options.members, "latency": options.latency,
+                       "error_rate": options.error_rate, "results": results}, f, indent=4)
+        print(f"Results saved to {options.json}")
+
+
+if __name__ == "__main__":
+    main()
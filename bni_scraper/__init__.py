@@ -0,0 +1,27 @@
+"""
+Scraper of the BNI member directory. Every crawl mode is a Crawler run with a
+work-list strategy and an output layout; see bni_scraper.cli for the modes.
+The HTTP engine lives in bni_scraper.http_engine and needs aiohttp.
+"""
+from .assets import AssetStore, open_asset_store
+from .browser import BrowserLauncher, open_engine
+from .checkpoint import CheckpointJournal
+from .crawl_limits import CrawlLimiter
+from .crawler import Crawler
+from .dedup_index import DedupIndex, member_key
+from .discovery import DropdownCache, DropdownDiscovery
+from .fetch_control import FetchController
+from .member_pool import MEMBER_CSV_HEADER, BrowserEngine
+from .outputs import OUTPUTS, PerChapterOutput, SingleFileOutput
+from .page_cache import PageCache, open_page_cache
+from .run_metrics import metrics
+from .strategies import (STRATEGIES, ChapterStrategy, CrossProductStrategy, FixedWorkList, WorkItem,
+                         WorkListStrategy)
+
+__all__ = [
+    "AssetStore", "BrowserEngine", "BrowserLauncher", "ChapterStrategy", "CheckpointJournal", "CrawlLimiter",
+    "Crawler", "CrossProductStrategy", "DedupIndex", "DropdownCache", "DropdownDiscovery", "FetchController",
+    "FixedWorkList", "MEMBER_CSV_HEADER", "OUTPUTS", "PageCache", "PerChapterOutput", "STRATEGIES",
+    "SingleFileOutput", "WorkItem", "WorkListStrategy", "member_key", "metrics", "open_asset_store", "open_engine",
+    "open_page_cache",
+]
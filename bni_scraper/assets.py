@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from .fetch_control import FetchController, guarded
+from .member_pool import DETAIL_CSV_HEADER
+from .page_cache import CACHE_ONLY
+from .run_metrics import metrics
+
+# Folder the downloaded profile photos and company logos are stored in
+ASSET_DIR = os.environ.get("BNI_ASSET_DIR", "assets")
+# Assets downloaded in parallel
+ASSET_CONCURRENCY = int(os.environ.get("BNI_ASSET_CONCURRENCY", 8))
+# Profile columns holding an asset URL, and the column its local file is written to
+ASSET_COLUMNS = {"ProfilePhotoLink": "ProfilePhotoFile", "CompanyLogo": "CompanyLogoFile"}
+# Columns appended to a row when assets are downloaded
+ASSET_CSV_HEADER = list(ASSET_COLUMNS.values())
+
+
+def _extension(url, content_type):
+    """File extension from the Content-Type, else from the URL path; "" when neither tells."""
+    extension = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ""
+    if not extension:
+        extension = os.path.splitext(urlparse(url).path)[1].lower()
+    # Guard against query-like or overlong suffixes ending up in file names
+    return extension if extension[1:].isalnum() and len(extension) <= 6 else ""
+
+
+class AssetStore:
+    """
+    Content-addressed store of the profile photos and company logos: each body
+    is saved once as <folder>/<sha256[:2]>/<sha256><ext>, so a logo shared by
+    several members (or served from several URLs) is one file. The URL to file
+    mapping is kept in <folder>/index.json, and a re-run reuses every asset
+    whose file is still there instead of downloading it again. Downloads go
+    through `session` (an aiohttp session), `limiter` and `controller`.
+    """
+
+    def __init__(self, session, folder=ASSET_DIR, limiter=None, controller=None):
+        self.session = session
+        self.folder = folder
+        self.index_path = os.path.join(folder, "index.json")
+        self.limiter = limiter
+        self.controller = controller
+        # URL -> file path relative to `folder`
+        self.paths = {}
+        self._downloads = {}
+        self.downloaded = 0
+        self.reused = 0
+        self.deduplicated = 0
+        self.failed = 0
+        self.bytes = 0
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.paths = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.paths = {}
+
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+        temporary_path = self.index_path + ".tmp"
+        with open(temporary_path, "w") as json_file:
+            json.dump(self.paths, json_file, indent=1)
+        os.replace(temporary_path, self.index_path)
+
+    async def fetch(self, url):
+        """
+        Local path of the asset at `url`, downloading it unless it is stored
+        already; "" for an empty cell or a failed download. Concurrent requests
+        for one URL share a single download.
+        """
+        url = (url or "").strip()
+        if not url.lower().startswith(("http://", "https://")):
+            return ""
+        relative = self.paths.get(url)
+        if relative and os.path.exists(os.path.join(self.folder, relative)):
+            self.reused += 1
+            return os.path.join(self.folder, relative)
+        if CACHE_ONLY:
+            return ""
+        if url not in self._downloads:
+            self._downloads[url] = asyncio.ensure_future(self._download(url))
+        relative = await self._downloads[url]
+        return os.path.join(self.folder, relative) if relative else ""
+
+    async def _download(self, url):
+        async def request():
+            async with self.session.get(url) as response:
+                response.raise_for_status()
+                return await response.read(), response.headers.get("Content-Type")
+
+        try:
+            with metrics.stage("asset_download"):
+                body, content_type = await guarded(self.controller, self.limiter, url, request)
+            digest = hashlib.sha256(body).hexdigest()
+            relative = os.path.join(digest[:2], digest + _extension(url, content_type))
+            path = os.path.join(self.folder, relative)
+            if os.path.exists(path):
+                self.deduplicated += 1
+                metrics.count("assets_deduplicated")
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp", "wb") as f:
+                    f.write(body)
+                os.replace(path + ".tmp", path)
+                self.downloaded += 1
+                self.bytes += len(body)
+                metrics.count("assets_downloaded")
+            self.paths[url] = relative
+            return relative
+        except Exception as e:
+            print(f"Error downloading asset {url}: {e}")
+            self.failed += 1
+            metrics.count("assets_failed")
+            return ""
+        finally:
+            self._downloads.pop(url, None)
+
+    async def localize(self, details):
+        """Local files of the asset URLs in `details` (profile cells), in ASSET_CSV_HEADER order."""
+        return list(await asyncio.gather(*(self.fetch(details[DETAIL_CSV_HEADER.index(column)])
+                                           for column in ASSET_COLUMNS)))
+
+    def report(self):
+        print(f"Assets: {self.downloaded} downloaded ({self.bytes / 1024 / 1024:.2f} MB), "
+              f"{self.reused} reused, {self.deduplicated} deduplicated by content, {self.failed} failed "
+              f"({len(self.paths)} URLs indexed in {self.index_path})")
+
+
+@asynccontextmanager
+async def open_asset_store(folder=ASSET_DIR, concurrency=ASSET_CONCURRENCY, limiter=None, controller=None):
+    """
+    Yields an AssetStore over its own pooled aiohttp session, with a separate
+    FetchController unless one is given so slow image hosts do not slow the
+    page rate. The URL index is saved when the store is closed.
+    """
+    # aiohttp is only needed when assets are downloaded
+    from .http_engine import create_session
+
+    async with create_session(concurrency) as session:
+        store = AssetStore(session, folder, limiter, controller if controller is not None else FetchController())
+        store.load()
+        try:
+            yield store
+        finally:
+            store.save()
+            store.report()
+            store.controller.report()
@@ -0,0 +1,380 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from .html_extract import next_page_url, parse_dropdown_options, parse_member_details, parse_member_list
+from .member_pool import DEFAULT_CONCURRENCY, MAX_LIST_PAGES, BrowserEngine, install_extractors
+from .page_cache import CACHE_ONLY, CacheMiss, install_page_cache
+from .crawl_plan import BASE_URL
+from .resource_blocking import ALLOWED_DOMAINS, HEADLESS, BlockingStats, block_unneeded_resources, site_domain
+from .run_metrics import metrics
+
+CHROMIUM_ARGS = [
+    "--disable-web-security", "--allow-http-screen-capture",
+    "--allow-running-insecure-content", "--disable-features=site-per-process",
+    "--no-sandbox", "--start-maximized"
+]
+
+
+# A pooled page is closed after this many navigations, a context after this many
+PAGE_NAVIGATIONS = int(os.environ.get("BNI_PAGE_RECYCLE", 50))
+CONTEXT_NAVIGATIONS = int(os.environ.get("BNI_CONTEXT_RECYCLE", 500))
+# The context is recycled when Chromium (with the Playwright driver) uses more memory than this; 0 disables it
+MAX_BROWSER_RSS_MB = int(os.environ.get("BNI_BROWSER_MAX_RSS_MB", 1500))
+# Navigations between two memory readings
+RSS_CHECK_INTERVAL = 25
+
+
+def process_tree_rss_mb(pid=None):
+    """Resident memory in MB of the child processes of `pid` (this process) and theirs, from /proc; None elsewhere."""
+    pid = pid or os.getpid()
+    children = {}
+    rss_pages = {}
+    try:
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", 'r') as f:
+                    # The command name may contain spaces; the fields after it are fixed
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            children.setdefault(int(fields[1]), []).append(int(entry))
+            rss_pages[int(entry)] = int(fields[21])
+    except OSError:
+        return None
+    total = 0
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        total += rss_pages.get(child, 0)
+        pending.extend(children.get(child, []))
+    return total * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+class BrowserLauncher:
+    """
+    Starts Playwright and Chromium the first time a browser engine is asked for,
+    and again after `restart`. Every context it creates skips unneeded
+    resources, serves documents from `cache` (a PageCache) when given and has
+    the member extractors registered.
+    """
+
+    def __init__(self, cache=None, limiter=None, controller=None, headless=HEADLESS):
+        self.cache = cache
+        self.limiter = limiter
+        self.controller = controller
+        self.headless = headless
+        self.blocking_stats = BlockingStats()
+        self.restarts = 0
+        self._playwright = None
+        self._browser = None
+        self._engine = None
+        self._pool = None
+        self._launch_lock = asyncio.Lock()
+
+    async def browser(self):
+        async with self._launch_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless, args=CHROMIUM_ARGS)
+            return self._browser
+
+    async def restart(self, browser):
+        """Closes `browser` if it is still the current one; the next context launches a new Chromium."""
+        async with self._launch_lock:
+            if browser is not self._browser:
+                return
+            self.restarts += 1
+            metrics.count("browser_restarts")
+            print("Restarting Chromium")
+            try:
+                await browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+    async def new_context(self, allowed_domains=()):
+        """A new context whose own scripts and XHRs may also come from `allowed_domains`."""
+        context = await (await self.browser()).new_context(ignore_https_errors=True,
+                                                           viewport={"width": 1366, "height": 768})
+        # Skip images, fonts, stylesheets and third-party scripts
+        await block_unneeded_resources(context, ALLOWED_DOMAINS | set(allowed_domains), stats=self.blocking_stats)
+        if self.cache is not None:
+            # Serve documents from the on-disk page cache
+            await install_page_cache(context, self.cache)
+        await install_extractors(context)
+        return context
+
+    async def engine(self):
+        """The BrowserEngine of this launcher, on a recycling PagePool, created on first use."""
+        if self._engine is None:
+            self._pool = PagePool(self, allowed_domains={site_domain(BASE_URL)})
+            self._engine = BrowserEngine(limiter=self.limiter, controller=self.controller, pages=self._pool)
+        return self._engine
+
+    @property
+    def launched(self):
+        return self._browser is not None
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.report()
+        if self._browser is not None:
+            self.blocking_stats.report()
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = self._playwright = self._engine = self._pool = None
+
+
+class PagePool:
+    """
+    Pages of a BrowserLauncher's browser that are recycled to keep Chromium's
+    memory flat: a page is closed after `page_navigations` navigations, and the
+    context after `context_navigations` or as soon as the browser's resident
+    memory passes `max_rss_mb`. A retired context is closed once its last page
+    comes back. A page that crashed with its browser restarts Chromium; the
+    engine re-queues the work on a page of the new browser. The contexts also
+    let through the scripts and XHRs of `allowed_domains`, the crawled site's.
+    """
+
+    def __init__(self, launcher, page_navigations=PAGE_NAVIGATIONS, context_navigations=CONTEXT_NAVIGATIONS,
+                 max_rss_mb=MAX_BROWSER_RSS_MB, allowed_domains=()):
+        self.launcher = launcher
+        self.allowed_domains = set(allowed_domains)
+        self.page_navigations = page_navigations
+        self.context_navigations = context_navigations
+        self.max_rss_mb = max_rss_mb
+        self.pages_recycled = 0
+        self.contexts_recycled = 0
+        self.peak_rss_mb = 0.0
+        self._context = None
+        self._context_navigations = 0
+        self._memory_retirements = 0
+        self._idle = []
+        # Navigations of each page handed out, and pages out per context
+        self._navigations = {}
+        self._pages_out = {}
+        self._lock = asyncio.Lock()
+
+    def _over_memory(self):
+        if not self.max_rss_mb or self._context_navigations % RSS_CHECK_INTERVAL:
+            return False
+        rss = process_tree_rss_mb()
+        if rss is None:
+            return False
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        if rss > self.max_rss_mb:
+            print(f"Chromium uses {rss:.0f} MB, recycling its context")
+            return True
+        return False
+
+    async def _retire_context(self):
+        context, self._context = self._context, None
+        idle, self._idle = self._idle, []
+        for page in idle:
+            await self._close_page(page)
+        if context is not None:
+            self.contexts_recycled += 1
+            if not self._pages_out.get(context):
+                await self._close_context(context)
+
+    async def _close_page(self, page):
+        self._navigations.pop(page, None)
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def _close_context(self, context):
+        self._pages_out.pop(context, None)
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def acquire(self):
+        async with self._lock:
+            if self._context is not None and not self._context.browser.is_connected():
+                # Chromium died while no page was out: start again with a new browser and context
+                browser = self._context.browser
+                self._context = None
+                for page in self._idle:
+                    self._navigations.pop(page, None)
+                self._idle = []
+                await self.launcher.restart(browser)
+            elif self._context is not None and self._context_navigations >= self.context_navigations:
+                self._memory_retirements = 0
+                await self._retire_context()
+            elif self._context is not None and self._over_memory():
+                self._memory_retirements += 1
+                browser = self._context.browser
+                await self._retire_context()
+                if self._memory_retirements > 1:
+                    # A fresh context did not bring the memory down: the browser process itself grew
+                    self._memory_retirements = 0
+                    await self.launcher.restart(browser)
+            if self._context is None:
+                self._context = await self.launcher.new_context(self.allowed_domains)
+                self._context_navigations = 0
+            self._context_navigations += 1
+            page = None
+            while self._idle and page is None:
+                page = self._idle.pop()
+                if page.is_closed():
+                    self._navigations.pop(page, None)
+                    page = None
+            if page is None:
+                page = await self._context.new_page()
+                self._navigations[page] = 0
+            self._pages_out[self._context] = self._pages_out.get(self._context, 0) + 1
+            return page
+
+    async def release(self, page, crashed=False):
+        async with self._lock:
+            context = page.context
+            self._pages_out[context] = self._pages_out.get(context, 1) - 1
+            self._navigations[page] = self._navigations.get(page, 0) + 1
+            if crashed and not context.browser.is_connected():
+                # The whole browser is gone: start again with a new Chromium and context
+                if self._context is not None and self._context.browser is context.browser:
+                    self._context = None
+                    self._idle = []
+                await self.launcher.restart(context.browser)
+            if context is self._context and not crashed and self._navigations[page] < self.page_navigations:
+                self._idle.append(page)
+                return
+            if not crashed and context is self._context:
+                self.pages_recycled += 1
+            await self._close_page(page)
+            if context is not self._context and not self._pages_out.get(context):
+                await self._close_context(context)
+
+    async def close(self):
+        """Closes the pool's context; pages still out are closed with it."""
+        async with self._lock:
+            context, self._context = self._context, None
+            idle, self._idle = self._idle, []
+            for page in idle:
+                await self._close_page(page)
+            if context is not None:
+                await self._close_context(context)
+
+    def report(self):
+        peak = f", peak Chromium memory {self.peak_rss_mb:.0f} MB" if self.peak_rss_mb else ""
+        print(f"Browser pool: {self.pages_recycled} pages and {self.contexts_recycled} contexts recycled, "
+              f"{self.launcher.restarts} browser restarts{peak}")
+
+
+class CacheFirstEngine:
+    """
+    Browser engine of a crawl with a page cache. Pages whose cached HTML is
+    fresh (any cached page in cache-only mode) are parsed with html_extract;
+    `launch`, a coroutine function returning a BrowserEngine, is only awaited
+    for the pages that need the network or their JavaScript. A run served
+    entirely from the cache never starts Chromium.
+    """
+
+    def __init__(self, cache, launch, cache_only=CACHE_ONLY):
+        self.cache = cache
+        self.launch = launch
+        self.cache_only = cache_only
+
+    def _cached_html(self, url):
+        """The cached body of `url`, or None when it has to be loaded; raises CacheMiss in cache-only mode."""
+        entry = self.cache.get(url)
+        if entry is not None and (self.cache_only or self.cache.is_fresh(entry)):
+            self.cache.hits += 1
+            metrics.count("cache_hits")
+            return entry.body.decode("utf-8", errors="replace")
+        if self.cache_only:
+            raise CacheMiss(url)
+        return None
+
+    async def dropdown_values(self, url, dropdown_ids):
+        html = self._cached_html(url)
+        if html is not None:
+            options = {dropdown_id: parse_dropdown_options(html, dropdown_id) for dropdown_id in dropdown_ids}
+            if all(options.values()):
+                return options
+        return await (await self.launch()).dropdown_values(url, dropdown_ids)
+
+    async def listing_rows(self, url):
+        """Every page of the listing from the cache, or the whole listing from Chromium if any page is missing."""
+        rows = []
+        seen = set()
+        page_url = url
+        while page_url and page_url not in seen and len(seen) < MAX_LIST_PAGES:
+            seen.add(page_url)
+            html = self._cached_html(page_url)
+            if html is None:
+                return await (await self.launch()).listing_rows(url)
+            with metrics.stage("parse"):
+                page_rows = parse_member_list(html, page_url)
+                page_url = next_page_url(html, page_url)
+            if page_rows is None:
+                return await (await self.launch()).listing_rows(url)
+            rows += page_rows
+        return rows
+
+    async def profile_details(self, link):
+        html = self._cached_html(link)
+        if html is None:
+            return await (await self.launch()).profile_details(link)
+        with metrics.stage("parse"):
+            return parse_member_details(html, link)
+
+    async def member_details(self, rows, concurrency=DEFAULT_CONCURRENCY):
+        """Same contract as BrowserEngine.member_details; only uncached profiles are loaded in Chromium."""
+        rows = [row for row in rows if row.get('link')]
+        results = [None] * len(rows)
+        uncached = []
+        for index, row in enumerate(rows):
+            try:
+                html = self._cached_html(row['link'])
+            except CacheMiss:
+                print(f"Not in cache: {row['link']}")
+                continue
+            if html is None:
+                uncached.append(index)
+                continue
+            with metrics.stage("parse"):
+                results[index] = parse_member_details(html, row['link'])
+
+        if uncached:
+            fetched = await (await self.launch()).member_details([rows[index] for index in uncached], concurrency)
+            for index, (_, details) in zip(uncached, fetched):
+                results[index] = details
+        return list(zip(rows, results))
+
+
+@asynccontextmanager
+async def open_engine(kind, concurrency, cache=None, limiter=None, controller=None):
+    """
+    Yields the page engine of a crawl: a BrowserEngine for kind "browser" (a
+    CacheFirstEngine when there is a `cache`), or an HttpEngine for kind "http".
+    Either way Chromium is launched on the first page that needs it, not before.
+    """
+    launcher = BrowserLauncher(cache, limiter, controller)
+    try:
+        if kind == "http":
+            # aiohttp is only needed for the HTTP engine
+            from .http_engine import HttpEngine, create_session
+            async with create_session(concurrency) as session:
+                engine = HttpEngine(session, launcher.engine, cache, limiter, controller)
+                yield engine
+                print(f"Pages read through the Chromium fallback: {engine.fallback_pages}")
+        elif cache is not None:
+            yield CacheFirstEngine(cache, launcher.engine)
+        else:
+            yield await launcher.engine()
+    finally:
+        await launcher.close()
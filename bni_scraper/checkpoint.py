@@ -0,0 +1,96 @@
+import json
+import os
+import time
+
+JOURNAL_FILE = "crawl_journal.jsonl"
+
+
+class CheckpointJournal:
+    """
+    Append-only JSON-lines journal of finished work: the output file of the run,
+    completed filter combinations and completed profile links. Records are kept
+    in memory and written, flushed and fsync'ed in batches of `sync_every`
+    records or every `sync_interval` seconds, whichever comes first.
+    `before_sync` is called before each batch is written, so an output sink can
+    flush its rows first and the journal never gets ahead of the output.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, sync_every=50, sync_interval=5.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.output_path = None
+        self.completed_combinations = set()
+        self.completed_profiles = set()
+        self.before_sync = None
+        self._file = None
+        self._pending = []
+        self._last_sync = time.monotonic()
+
+    def load(self):
+        """
+        Reads the journal in one pass. A torn last line left by a crash is ignored.
+        Returns False if there is no journal to resume from.
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                kind = record.get("type")
+                if kind == "output":
+                    self.output_path = record["path"]
+                elif kind == "combination":
+                    self.completed_combinations.add(tuple(record["key"]))
+                elif kind == "profile":
+                    self.completed_profiles.add(record["link"])
+        print(f"Resuming from {self.path}: {len(self.completed_combinations)} combinations and "
+              f"{len(self.completed_profiles)} profiles already done")
+        return True
+
+    def open(self, resume=False):
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._file.tell() > 0:
+            # Terminate a torn last line so the next record starts on its own line
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def _append(self, record):
+        self._pending.append(json.dumps(record) + "\n")
+        if len(self._pending) >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def record_output(self, path):
+        self.output_path = path
+        self._append({"type": "output", "path": path})
+        self.sync()
+
+    def record_combination(self, key):
+        self.completed_combinations.add(tuple(key))
+        self._append({"type": "combination", "key": list(key)})
+
+    def record_profile(self, link):
+        self.completed_profiles.add(link)
+        self._append({"type": "profile", "link": link})
+
+    def sync(self):
+        if self._file is None or not self._pending:
+            return
+        if self.before_sync is not None:
+            self.before_sync()
+        self._file.writelines(self._pending)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = []
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
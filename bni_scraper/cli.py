@@ -0,0 +1,265 @@
+"""
+Command line entry points of the crawl modes. Each mode is the same Crawler
+with a different work-list strategy and output layout:
+
+    all       the region's memberlist into website_<run id>.csv, resumable
+    index     the region's memberlist into website_<run id>.csv
+    chapters  one memberlist per chapter into csv_<run id>/<chapter>.csv
+
+all and index read the region-wide memberlist page by page; with
+--strategy cross_product they list the chapter/city/area combinations
+instead (all only those of the saved combination plan).
+
+    python -m bni_scraper all --resume
+    python -m bni_scraper chapters --engine http
+    python -m bni_scraper index --assets --asset-dir assets
+    python -m bni_scraper index --strategy cross_product --dry-run
+
+`python -m bni_scraper regions|shards|incremental ...` runs the multi-region,
+sharded and incremental crawls.
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import os
+import sys
+
+from .assets import ASSET_CONCURRENCY, ASSET_CSV_HEADER, ASSET_DIR
+from .checkpoint import CheckpointJournal
+from .crawl_plan import plan_file_path
+from .crawler import LISTING_CONCURRENCY, Crawler
+from .dedup_index import DedupIndex, member_key
+from .discovery import DropdownCache, DropdownDiscovery
+from .fetch_control import FetchController
+from .member_pool import MEMBER_CSV_HEADER
+from .outputs import PerChapterOutput, SingleFileOutput, run_output_path
+from .page_cache import open_page_cache
+from .page_ready import print_wait_summary, wait_log
+from .run_metrics import metrics
+from .strategies import ChapterStrategy, CrossProductStrategy, RegionStrategy
+
+json_file_path = 'dropdown_values.json'
+wait_times_file = "wait_times.csv"
+
+
+def output_header(options):
+    """The member columns, plus the local photo and logo files when assets are downloaded."""
+    return MEMBER_CSV_HEADER + (ASSET_CSV_HEADER if options.assets else [])
+
+
+async def crawl(strategy, output, options, member_index=None, journal=None):
+    """
+    Runs one Crawler with the engine, cache and fetch controller chosen by
+    `options`, and with --assets an asset store for the photos and logos.
+    """
+    from .assets import open_asset_store
+    from .browser import open_engine
+
+    cache = open_page_cache()
+    # Every navigation and request is rate limited and retried through one controller
+    fetch_controller = FetchController()
+    # Each wait for a page's ready element is streamed to the wait times file
+    wait_log.open(wait_times_file)
+    try:
+        async with contextlib.AsyncExitStack() as stack:
+            engine = await stack.enter_async_context(
+                open_engine(options.engine, options.concurrency, cache, controller=fetch_controller))
+            assets = None
+            if options.assets:
+                assets = await stack.enter_async_context(
+                    open_asset_store(options.asset_dir, options.asset_concurrency))
+            # Stored dropdown options are reused; stale ones are refreshed while the crawl runs
+            discovery = DropdownDiscovery(DropdownCache(json_file_path))
+            dropdown_options = await discovery.options(engine, strategy.dropdown_ids)
+            try:
+                crawler = Crawler(engine, strategy, output, options.concurrency, member_index, journal,
+                                  listing_concurrency=options.listing_concurrency, assets=assets,
+                                  asset_concurrency=options.asset_concurrency)
+                stats = await crawler.run(dropdown_options)
+            finally:
+                await discovery.wait()
+    finally:
+        print_wait_summary()
+        wait_log.close()
+        fetch_controller.report()
+        if cache is not None:
+            cache.report()
+            cache.close()
+    return stats
+
+
+async def list_urls(strategy, options):
+    """Prints the memberlist URL of every work item of `strategy` without crawling them."""
+    from .browser import open_engine
+
+    cache = open_page_cache()
+    try:
+        async with open_engine(options.engine, options.concurrency, cache) as engine:
+            discovery = DropdownDiscovery(DropdownCache(json_file_path))
+            dropdown_options = await discovery.options(engine, strategy.dropdown_ids)
+            try:
+                items = await strategy.work_items(engine, dropdown_options)
+            finally:
+                await discovery.wait()
+    finally:
+        if cache is not None:
+            cache.close()
+    for item in items:
+        print(strategy.url(item))
+    print(f"{len(items)} memberlist URLs ({strategy.name})")
+    return items
+
+
+def build_parser(description, resume=False, strategies=False):
+    parser = argparse.ArgumentParser(description=description)
+    if strategies:
+        parser.add_argument("--strategy", choices=["region", "cross_product"], default="region",
+                            help="region lists the whole region page by page, cross_product lists every "
+                                 "chapter/city/area combination")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="only print the memberlist URLs of the work list, without crawling them")
+    parser.add_argument("--engine", choices=["browser", "http"], default=os.environ.get("BNI_ENGINE", "browser"),
+                        help="browser drives Chromium, http parses the HTML and only uses Chromium as a fallback")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("BNI_CONCURRENCY", 4)),
+                        help="member profile pages fetched in parallel")
+    parser.add_argument("--listing-concurrency", type=int, default=LISTING_CONCURRENCY,
+                        help="memberlist pages read in parallel")
+    parser.add_argument("--assets", action="store_true", default=os.environ.get("BNI_ASSETS", "0") == "1",
+                        help="download profile photos and company logos and add their local files to the rows "
+                             "(a resumed run must use the same setting, as it changes the columns)")
+    parser.add_argument("--asset-dir", default=ASSET_DIR, help="folder of the content-addressed asset files")
+    parser.add_argument("--asset-concurrency", type=int, default=ASSET_CONCURRENCY,
+                        help="asset downloads in parallel")
+    parser.add_argument("--run-id", default=os.environ.get("BNI_RUN_ID"),
+                        help="names the outputs of this run (default: the start time, YYYYmmdd_HHMMSS)")
+    if resume:
+        parser.add_argument("--resume", action="store_true",
+                            help="continue the last run recorded in the checkpoint journal")
+    return parser
+
+
+def run_all(options):
+    """
+    The all.py mode: the region listing (or the planned combinations) into one
+    output, journaled so it can be resumed.
+    """
+    if options.strategy == "region":
+        strategy = RegionStrategy()
+    else:
+        strategy = CrossProductStrategy(plan_file_path(json_file_path))
+    if options.dry_run:
+        asyncio.run(list_urls(strategy, options))
+        return
+
+    # Finished combinations and profiles are journaled so a crashed run can be resumed
+    journal = CheckpointJournal()
+    resuming = options.resume and journal.load() and journal.output_path is not None \
+        and os.path.exists(journal.output_path)
+    if options.resume and not resuming:
+        print("Nothing to resume, starting a new run.")
+        journal = CheckpointJournal()
+
+    # File path for the new file, or the file of the run being resumed
+    if resuming:
+        csv_file_path = journal.output_path
+        print(f"Resuming CSV file: {csv_file_path}")
+    else:
+        csv_file_path = run_output_path("website", ".csv", options.run_id)
+        print(f"Created CSV file: {csv_file_path}")
+    journal.open(resume=resuming)
+    if not resuming:
+        journal.record_output(csv_file_path)
+    # Rows are buffered and written in batches to the CSV and any extra BNI_OUTPUT_FORMATS.
+    # Only the journal flushes the outputs, right before each sync: it never records unwritten
+    # rows, and no row reaches disk long before its profile is journaled (a resume would add it again).
+    output = SingleFileOutput(csv_file_path, output_header(options), auto_flush=False)
+    journal.before_sync = output.flush
+
+    # Digests of the members already written, kept next to the output so a resumed run
+    # (or a crash before the index was saved, via the journal) skips them again
+    member_index = DedupIndex(os.path.splitext(csv_file_path)[0] + ".members.idx")
+    if resuming:
+        member_index.load()
+        for link in journal.completed_profiles:
+            member_index.mark_written(member_key(link))
+
+    try:
+        asyncio.run(crawl(strategy, output, options, member_index, journal))
+    finally:
+        journal.close()
+        output.close()
+        member_index.save()
+        output.report()
+        # Stage timings, page load histograms, bytes and retries of this run
+        metrics.print_summary()
+        metrics.save_report(os.path.splitext(csv_file_path)[0] + ".report.json")
+
+
+def run_index(options):
+    """
+    The index.py mode: the region listing (or every combination, unplanned) into
+    one output. With --dry-run only the URLs are printed (the old secdelivery1py).
+    """
+    strategy = RegionStrategy() if options.strategy == "region" else CrossProductStrategy()
+    if options.dry_run:
+        asyncio.run(list_urls(strategy, options))
+        return
+    csv_file_path = run_output_path("website", ".csv", options.run_id)
+    output = SingleFileOutput(csv_file_path, output_header(options))
+    print(f"Created CSV file: {csv_file_path}")
+    try:
+        asyncio.run(crawl(strategy, output, options))
+    finally:
+        output.close()
+        output.report()
+        metrics.print_summary()
+        metrics.save_report()
+
+
+def run_chapters(options):
+    """The byChapterName.py mode: one output per chapter inside a new csv_<run id> folder."""
+    output = PerChapterOutput(run_output_path("csv", run_id=options.run_id), output_header(options))
+    try:
+        asyncio.run(crawl(ChapterStrategy(), output, options))
+    finally:
+        output.close()
+        output.report()
+        metrics.print_summary()
+        metrics.save_report()
+
+
+def main_all():
+    run_all(build_parser("Scrape every member of the region into one CSV, resumably.", resume=True,
+                         strategies=True).parse_args())
+
+
+def main_index():
+    run_index(build_parser("Scrape every member of the region into one CSV.", strategies=True).parse_args())
+
+
+def main_chapters():
+    run_chapters(build_parser("Scrape every chapter into its own CSV in a new csv_<run id> folder.").parse_args())
+
+
+COMMANDS = {
+    "all": main_all,
+    "index": main_index,
+    "chapters": main_chapters,
+    # Imported on demand, these modules pull in their own dependencies
+    "regions": "bni_scraper.regions",
+    "shards": "bni_scraper.shards",
+    "incremental": "bni_scraper.incremental",
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(f"usage: python -m bni_scraper {{{','.join(COMMANDS)}}} [options]")
+        sys.exit(2)
+    command = sys.argv.pop(1)
+    sys.argv[0] = f"bni_scraper {command}"
+    entry_point = COMMANDS[command]
+    if isinstance(entry_point, str):
+        entry_point = importlib.import_module(entry_point).main
+    entry_point()
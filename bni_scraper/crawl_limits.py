@@ -0,0 +1,52 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager, nullcontext
+from urllib.parse import urlparse
+
+
+class CrawlLimiter:
+    """
+    Concurrency budget shared by every crawl in the process: at most
+    `global_limit` page loads in flight overall, at most `per_host_limit` per
+    host, and consecutive loads from one host started at least
+    `per_host_delay` seconds apart. A load waits for its host's slot before it
+    takes a global one, so a backlog on one host never holds global slots that
+    loads of other hosts could use.
+    """
+
+    def __init__(self, global_limit=16, per_host_limit=4, per_host_delay=0.0):
+        self.global_limit = global_limit
+        self.per_host_limit = per_host_limit
+        self.per_host_delay = per_host_delay
+        self._global = asyncio.Semaphore(global_limit)
+        self._hosts = {}
+        self._host_locks = {}
+        self._last_start = {}
+
+    def _host_semaphore(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host_limit)
+            self._host_locks[host] = asyncio.Lock()
+        return self._hosts[host]
+
+    async def _respect_delay(self, host):
+        if not self.per_host_delay:
+            return
+        async with self._host_locks[host]:
+            wait = self._last_start.get(host, 0) + self.per_host_delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_start[host] = time.monotonic()
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlparse(url).hostname or ""
+        async with self._host_semaphore(host):
+            async with self._global:
+                await self._respect_delay(host)
+                yield
+
+
+def limiter_slot(limiter, url):
+    """`limiter.slot(url)`, or a no-op context when no limiter is used."""
+    return limiter.slot(url) if limiter is not None else nullcontext()
@@ -0,0 +1,114 @@
+import json
+import os
+
+# BNI_BASE_URL points the crawl at another site, such as the local mock_site.py
+BASE_URL = os.environ.get("BNI_BASE_URL", "https://bnicentraldubai.ae/en-AE/")
+REGION_ID = "22241"
+
+# Column of the memberlist table holding the member's city
+CITY_COLUMN = 2
+
+# The plan is stored next to dropdown_values.json
+PLAN_FILE_NAME = "combination_plan.json"
+
+
+def memberlist_url(chapter_name="", chapter_city="", chapter_area="", base_url=BASE_URL, region_id=REGION_ID):
+    """Builds the memberlist URL for one chapterName/chapterCity/chapterArea filter."""
+    return (f"{base_url}memberlist?chapterName={chapter_name}"
+            f"&chapterCity={chapter_city}"
+            f"&chapterArea={chapter_area}"
+            f"&memberFirstName=&memberKeywords=&memberLastName=&memberCompany=&regionIds={region_id}")
+
+
+def plan_file_path(json_file_path):
+    return os.path.join(os.path.dirname(os.path.abspath(json_file_path)), PLAN_FILE_NAME)
+
+
+def _normalize(value):
+    return " ".join(value.split()).lower()
+
+
+async def _listing_rows(engine, url):
+    print(f"Probing URL: {url}")
+    return await engine.listing_rows(url)
+
+
+async def build_combination_plan(engine, dropdown_values, base_url=BASE_URL, region_id=REGION_ID):
+    """
+    Finds the chapterName/chapterCity/chapterArea combinations that can return members.
+    Every chapter is first loaded without city or area (as byChapterName.py does) and
+    chapters without members are dropped. For the remaining chapters each area is
+    probed and the cities listed in its table are matched against the chapterCity
+    dropdown values. `engine` is a BrowserEngine or HttpEngine. Returns a list of [chapter_name, chapter_city, chapter_area].
+    """
+    chapter_names = [name for name in dropdown_values.get("chapterName", []) if name]
+    chapter_cities = [city for city in dropdown_values.get("chapterCity", []) if city]
+    chapter_areas = [area for area in dropdown_values.get("chapterArea", []) if area]
+    cities_by_key = {}
+    for city in chapter_cities:
+        cities_by_key.setdefault(_normalize(city), []).append(city)
+
+    combinations = []
+    for chapter_name in chapter_names:
+        try:
+            rows = await _listing_rows(engine, memberlist_url(chapter_name, "", "", base_url, region_id))
+        except Exception as e:
+            # Keep the whole chapter when it cannot be probed
+            print(f"Error probing chapter {chapter_name}: {e}")
+            combinations.extend([chapter_name, city, area]
+                                for city in chapter_cities for area in chapter_areas)
+            continue
+        if not rows:
+            print(f"Chapter {chapter_name} has no members, skipping it.")
+            continue
+
+        for chapter_area in chapter_areas:
+            try:
+                rows = await _listing_rows(engine, memberlist_url(chapter_name, "", chapter_area, base_url, region_id))
+            except Exception as e:
+                print(f"Error probing chapter {chapter_name} area {chapter_area}: {e}")
+                combinations.extend([chapter_name, city, chapter_area] for city in chapter_cities)
+                continue
+            found = set()
+            for row in rows:
+                if len(row['data']) > CITY_COLUMN:
+                    found.update(cities_by_key.get(_normalize(row['data'][CITY_COLUMN]), []))
+            combinations.extend([chapter_name, city, chapter_area]
+                                for city in chapter_cities if city in found)
+
+    total = len(chapter_names) * len(chapter_cities) * len(chapter_areas)
+    print(f"Planned {len(combinations)} of {total} combinations.")
+    return combinations
+
+
+def load_combination_plan(path, dropdown_values):
+    """Returns the saved combinations, or None if there is no plan for these dropdown values."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return None
+    if plan.get("dropdown_values") != dropdown_values:
+        print(f"Dropdown values changed since {path} was written, planning again.")
+        return None
+    return plan.get("combinations", [])
+
+
+def save_combination_plan(path, dropdown_values, combinations):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"dropdown_values": dropdown_values, "combinations": combinations}, f, indent=4)
+    print(f"Combination plan saved to {path}")
+
+
+async def get_combination_plan(engine, dropdown_values, path, base_url=BASE_URL, region_id=REGION_ID):
+    """Loads the plan saved at `path`, probing the memberlist and saving it if needed."""
+    combinations = load_combination_plan(path, dropdown_values)
+    if combinations is not None:
+        print(f"Loaded {len(combinations)} combinations from {path}")
+        return combinations
+    combinations = await build_combination_plan(engine, dropdown_values, base_url, region_id)
+    save_combination_plan(path, dropdown_values, combinations)
+    return combinations
@@ -0,0 +1,239 @@
+import asyncio
+import os
+
+from .assets import ASSET_CONCURRENCY
+from .dedup_index import DedupIndex, member_key
+from .member_pool import DEFAULT_CONCURRENCY, build_detailed_row
+
+# Memberlist pages read in parallel; profiles use the crawl concurrency
+LISTING_CONCURRENCY = int(os.environ.get("BNI_LISTING_CONCURRENCY", 1))
+# Entries each bounded queue holds per worker of the stage reading from it
+QUEUE_FACTOR = 2
+
+
+class Crawler:
+    """
+    The crawl every mode shares. `strategy` (a WorkListStrategy) decides which
+    memberlists to read, `engine` (BrowserEngine or HttpEngine) reads them and
+    the member profiles, and `output` (SingleFileOutput, PerChapterOutput)
+    stores the rows. Each member is fetched at most once, tracked in
+    `member_index`. With a `journal` (CheckpointJournal) finished work items and
+    profiles are recorded, and work items it already holds are skipped. With
+    `assets` (an AssetStore) each member's photo and logo are downloaded and
+    their local files appended to the row, as ASSET_CSV_HEADER.
+    """
+
+    def __init__(self, engine, strategy, output, concurrency=DEFAULT_CONCURRENCY, member_index=None,
+                 journal=None, name="", listing_concurrency=LISTING_CONCURRENCY, assets=None,
+                 asset_concurrency=ASSET_CONCURRENCY):
+        self.engine = engine
+        self.strategy = strategy
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.listing_concurrency = max(1, listing_concurrency)
+        self.member_index = member_index if member_index is not None else DedupIndex()
+        self.journal = journal
+        self.assets = assets
+        self.asset_concurrency = max(1, asset_concurrency)
+        self.prefix = f"[{name}] " if name else ""
+        self.stats = {
+            "listed_members": 0,
+            "profiles_fetched": 0,
+            "skipped_known_member": 0,
+            "profiles_failed": 0,
+            "written": 0,
+        }
+
+    def write_members(self, item, fetched):
+        """Writes (and journals) the fetched (row, details) pairs; returns the rows whose profile failed."""
+        failed = []
+        for row, details in fetched:
+            if details is None:
+                # Not indexed or journaled, so it is tried again later or on resume
+                self.member_index.discard(member_key(row['link'], row['data']))
+                failed.append(row)
+                continue
+
+            self.output.write(item, build_detailed_row(row['data'], details), row['link'])
+            self.stats["written"] += 1
+            self.member_index.mark_written(member_key(row['link'], row['data']))
+            if self.journal is not None:
+                self.journal.record_profile(row['link'])
+        return failed
+
+    def _open_items(self, work_items):
+        """Work items still to crawl; those the journal holds are skipped."""
+        for item in work_items:
+            key = (item.chapter_name, item.chapter_city, item.chapter_area)
+            if self.journal is not None and key in self.journal.completed_combinations:
+                continue
+            yield item
+
+    async def _list(self, items, profiles, written):
+        """
+        Listing stage: lists work items and queues the rows of members not
+        fetched yet, numbered in memberlist order so the writer can restore it.
+        """
+        while True:
+            entry = await items.get()
+            if entry is None:
+                return
+            sequence, item = entry
+            url = self.strategy.url(item)
+            print(f"{self.prefix}Navigating to URL: {url}")
+            # `pending` counts the listing itself and each queued profile until the writer is through with them
+            state = {"sequence": sequence, "pending": 1, "failed": [], "error": False, "rows": {}, "next_row": 0}
+            index = 0
+            self.output.begin(item)
+            try:
+                rows_with_links = await self.engine.listing_rows(url)
+                # Drop members already fetched in this run or in the run being resumed
+                # before navigating; the index also stops duplicate rows reaching the output
+                for row in rows_with_links:
+                    if not row['link']:
+                        continue
+                    self.stats["listed_members"] += 1
+                    if not self.member_index.add(member_key(row['link'], row['data'])):
+                        self.stats["skipped_known_member"] += 1
+                        continue
+                    state["pending"] += 1
+                    # Waits while the profile stage is behind
+                    await profiles.put((item, state, index, row))
+                    index += 1
+            except Exception as e:
+                print(f"{self.prefix}Error navigating to {url} or extracting data: {e}")
+                state["error"] = True
+            await written.put((item, state, None, None, None))
+
+    async def _fetch_profiles(self, profiles, written):
+        """Profile stage: reads the profile cells of each queued member."""
+        while True:
+            entry = await profiles.get()
+            if entry is None:
+                return
+            item, state, index, row = entry
+            try:
+                details = await self.engine.profile_details(row['link'])
+            except Exception as e:
+                print(f"{self.prefix}Error extracting member details from {row['link']}: {e}")
+                details = None
+            self.stats["profiles_fetched"] += 1
+            await written.put((item, state, index, row, details))
+
+    async def _download_assets(self, downloads, written):
+        """Asset stage: appends the local photo and logo files to the profile cells of each member."""
+        while True:
+            entry = await downloads.get()
+            if entry is None:
+                return
+            item, state, index, row, details = entry
+            if details is not None:
+                details = details + await self.assets.localize(details)
+            await written.put((item, state, index, row, details))
+
+    async def _write(self, written):
+        """
+        Sink stage: assembles and writes the rows, and finishes a work item once
+        its listing and every one of its profiles are through. Profiles finish
+        in any order, so rows are held until the ones before them arrive and
+        go out in work item and memberlist order, as a sequential crawl writes
+        them.
+        """
+        # Work items by sequence number, from the one being written to those that arrived early
+        waiting = {}
+        next_item = 0
+        while True:
+            entry = await written.get()
+            if entry is None:
+                return
+            item, state, index, row, details = entry
+            if row is not None:
+                state["rows"][index] = (row, details)
+            state["pending"] -= 1
+            waiting[state["sequence"]] = (item, state)
+
+            while next_item in waiting:
+                item, state = waiting[next_item]
+                while state["next_row"] in state["rows"]:
+                    pair = state["rows"].pop(state["next_row"])
+                    state["failed"] += self.write_members(item, [pair])
+                    state["next_row"] += 1
+                if state["pending"]:
+                    break
+                del waiting[next_item]
+                next_item += 1
+                self._finish_item(item, state)
+
+    def _finish_item(self, item, state):
+        self.output.finish(item)
+        self._failed_items.extend((item, failed_row) for failed_row in state["failed"])
+        # A work item with failed profiles stays open, so a resumed run lists it again
+        if not state["failed"] and not state["error"] and self.journal is not None:
+            self.journal.record_combination((item.chapter_name, item.chapter_city, item.chapter_area))
+
+    async def run(self, dropdown_options):
+        """
+        Crawls every work item of the strategy as a pipeline of stages joined by
+        bounded queues: work items -> `listing_concurrency` listing workers ->
+        `concurrency` profile workers -> (with an asset store, `asset_concurrency`
+        asset workers ->) one writer. A full queue holds back the
+        stage feeding it, so only a few listings' worth of rows is in memory at
+        any time. Returns the run statistics.
+        """
+        work_items = await self.strategy.work_items(self.engine, dropdown_options)
+        items = asyncio.Queue(self.listing_concurrency)
+        profiles = asyncio.Queue(self.concurrency * QUEUE_FACTOR)
+        written = asyncio.Queue(self.concurrency * QUEUE_FACTOR)
+        # Without an asset store the profile workers hand their rows straight to the writer
+        downloads = asyncio.Queue(self.asset_concurrency * QUEUE_FACTOR) if self.assets is not None else written
+        # Profiles that still failed after their retries, fetched once more at the end
+        self._failed_items = []
+
+        listers = [asyncio.create_task(self._list(items, profiles, written))
+                   for _ in range(self.listing_concurrency)]
+        fetchers = [asyncio.create_task(self._fetch_profiles(profiles, downloads)) for _ in range(self.concurrency)]
+        downloaders = []
+        if self.assets is not None:
+            downloaders = [asyncio.create_task(self._download_assets(downloads, written))
+                           for _ in range(self.asset_concurrency)]
+        writer = asyncio.create_task(self._write(written))
+        stages = [*listers, *fetchers, *downloaders, writer]
+
+        async def feed():
+            for sequence, item in enumerate(self._open_items(work_items)):
+                await items.put((sequence, item))
+            # Each stage is told to stop once the stages feeding it have finished
+            for _ in listers:
+                await items.put(None)
+            await asyncio.gather(*listers)
+            for _ in fetchers:
+                await profiles.put(None)
+            await asyncio.gather(*fetchers)
+            for _ in downloaders:
+                await downloads.put(None)
+            await asyncio.gather(*downloaders)
+            await written.put(None)
+
+        try:
+            # A stage that fails stops the crawl instead of leaving the others blocked on its queue
+            await asyncio.gather(feed(), *stages)
+        finally:
+            for task in stages:
+                task.cancel()
+
+        if self._failed_items:
+            print(f"{self.prefix}Retrying {len(self._failed_items)} failed member profiles")
+            retry_items = [(item, row) for item, row in self._failed_items
+                           if self.member_index.add(member_key(row['link'], row['data']))]
+            fetched = await self.engine.member_details([row for _, row in retry_items], self.concurrency)
+            for (item, _), (row, details) in zip(retry_items, fetched):
+                if details is not None and self.assets is not None:
+                    details = details + await self.assets.localize(details)
+                self.stats["profiles_failed"] += len(self.write_members(item, [(row, details)]))
+
+        print(f"{self.prefix}Members listed: {self.stats['listed_members']}, "
+              f"profiles fetched: {self.stats['profiles_fetched']}, "
+              f"fetches avoided: {self.stats['skipped_known_member']}, "
+              f"profiles failed: {self.stats['profiles_failed']} "
+              f"({len(self.member_index)} distinct members indexed)")
+        return self.stats
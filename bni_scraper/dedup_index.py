@@ -0,0 +1,131 @@
+import hashlib
+import math
+import os
+from array import array
+from bisect import bisect_left
+from urllib.parse import urlsplit, urlunsplit
+
+# BNI_DEDUP_BLOOM=1 puts a Bloom filter in front of the digest lookups
+BLOOM_ENABLED = os.environ.get("BNI_DEDUP_BLOOM", "0") == "1"
+
+
+def _normalize_text(value):
+    return " ".join(str(value).split()).lower()
+
+
+def member_key(link=None, data=None):
+    """
+    Normalized identity of a member: the profile link (lowercase scheme and host,
+    no fragment or trailing slash) or, without a link, MemberName + Company.
+    """
+    if link:
+        parts = urlsplit(link.strip())
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+    data = data or []
+    name = data[0] if len(data) > 0 else ""
+    company = data[5] if len(data) > 5 else ""
+    return f"{_normalize_text(name)}|{_normalize_text(company)}"
+
+
+def key_digest(key):
+    """64-bit digest of a member key."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class BloomFilter:
+    def __init__(self, expected_items, false_positive_rate=0.01):
+        expected_items = max(expected_items, 1000)
+        self.size = int(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest):
+        # Double hashing on the two 32-bit halves of the digest
+        first, second = digest >> 32, (digest & 0xFFFFFFFF) | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class DedupIndex:
+    """
+    Set of member keys stored as 64-bit digests rather than full rows. Digests
+    loaded from disk live in a sorted array (8 bytes each) searched with bisect;
+    digests added during the run live in a small set. Only the keys marked
+    written (their row reached the output) are merged and saved by `save`, so
+    an interrupted run never persists members that were queued but not written.
+    An optional Bloom filter answers most negative lookups without either.
+    """
+
+    def __init__(self, path=None, bloom=BLOOM_ENABLED, expected_items=100000):
+        self.path = path
+        self.expected_items = expected_items
+        self._stored = array("Q")
+        self._added = set()
+        self._written = set()
+        self.bloom = BloomFilter(expected_items) if bloom else None
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return self
+        stored = array("Q")
+        with open(self.path, "rb") as f:
+            stored.frombytes(f.read())
+        self._stored = array("Q", sorted(stored))
+        if self.bloom is not None:
+            self.bloom = BloomFilter(max(self.expected_items, len(self._stored) * 2))
+            for digest in self._stored:
+                self.bloom.add(digest)
+        print(f"Loaded {len(self._stored)} member keys from {self.path}")
+        return self
+
+    def _contains_digest(self, digest):
+        if self.bloom is not None and digest not in self.bloom:
+            return False
+        if digest in self._added:
+            return True
+        index = bisect_left(self._stored, digest)
+        return index < len(self._stored) and self._stored[index] == digest
+
+    def __contains__(self, key):
+        return self._contains_digest(key_digest(key))
+
+    def __len__(self):
+        return len(self._stored) + len(self._added)
+
+    def add(self, key):
+        """Adds `key`; returns False if it was already present."""
+        digest = key_digest(key)
+        if self._contains_digest(digest):
+            return False
+        self._added.add(digest)
+        if self.bloom is not None:
+            self.bloom.add(digest)
+        return True
+
+    def mark_written(self, key):
+        """Adds `key` if needed and records that its row was written, so `save` keeps it."""
+        self.add(key)
+        self._written.add(key_digest(key))
+
+    def discard(self, key):
+        """Forgets a key added during this run (keys loaded from disk stay)."""
+        self._added.discard(key_digest(key))
+
+    def save(self):
+        if not self.path:
+            return
+        merged = array("Q", sorted(set(self._stored) | self._written))
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            merged.tofile(f)
+        os.replace(temporary_path, self.path)
+        self._stored = merged
+        # Keys queued but not written stay in memory for the rest of the run only
+        self._added -= self._written
+        self._written = set()
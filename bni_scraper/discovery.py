@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import time
+
+from .crawl_plan import BASE_URL
+
+# The findamember dropdown options are stored here between runs
+DROPDOWN_FILE = "dropdown_values.json"
+# Seconds the stored options are used without reading the findamember page again
+DROPDOWN_TTL = int(os.environ.get("BNI_DROPDOWN_TTL", 24 * 3600))
+
+
+def diff_options(old, new):
+    """
+    {dropdown_id: {"added": [...], "removed": [...], "renamed": [...]}} of the
+    dropdowns that changed between two {dropdown_id: [{"value", "text"}]}. A
+    dropdown missing from (or empty in) `new` counts as unchanged, since an
+    empty read is more likely a failed page than a site without chapters.
+    """
+    diff = {}
+    for dropdown_id, new_options in new.items():
+        if not new_options:
+            continue
+        old_texts = {option["value"]: option.get("text") for option in old.get(dropdown_id, [])}
+        new_texts = {option["value"]: option.get("text") for option in new_options}
+        changes = {
+            "added": [value for value in new_texts if value not in old_texts],
+            "removed": [value for value in old_texts if value not in new_texts],
+            "renamed": [value for value, text in new_texts.items()
+                        if value in old_texts and old_texts[value] != text],
+        }
+        if any(changes.values()):
+            diff[dropdown_id] = changes
+    return diff
+
+
+def apply_diff(options, new, diff):
+    """
+    `options` with `diff` applied: removed options dropped, renamed ones given
+    their new text and added ones appended, so the order of the options that
+    stayed (and the combination plan built on them) is kept.
+    """
+    updated = {dropdown_id: list(values) for dropdown_id, values in options.items()}
+    for dropdown_id, changes in diff.items():
+        new_texts = {option["value"]: option.get("text") for option in new[dropdown_id]}
+        removed = set(changes["removed"])
+        kept = [{"value": option["value"], "text": new_texts[option["value"]]}
+                for option in updated.get(dropdown_id, []) if option["value"] not in removed]
+        updated[dropdown_id] = kept + [{"value": value, "text": new_texts[value]} for value in changes["added"]]
+    return updated
+
+
+class DropdownCache:
+    """
+    The findamember dropdown options of the last discovery, in `path`. The file
+    keeps a plain value list per dropdown, as older runs wrote it and as the
+    shard and plan code read it, plus the option texts and when each dropdown
+    was last read.
+    """
+
+    def __init__(self, path=DROPDOWN_FILE, ttl=DROPDOWN_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.options = {}
+        # dropdown_id -> time its options were last read from the findamember page
+        self.fetched_at = {}
+
+    def load(self):
+        """Reads the file; returns False when there is none. Files without texts or times count as stale."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        if not isinstance(stored, dict):
+            return False
+        texts = stored.get("texts", {})
+        self.options = {
+            dropdown_id: [{"value": value, "text": texts.get(dropdown_id, {}).get(value)} for value in values if value]
+            for dropdown_id, values in stored.items() if isinstance(values, list)
+        }
+        fetched_at = stored.get("fetched_at", {})
+        if not isinstance(fetched_at, dict):
+            # Older files kept one time for the whole file
+            fetched_at = {dropdown_id: fetched_at for dropdown_id in self.options}
+        self.fetched_at = fetched_at
+        return True
+
+    def save(self):
+        stored = {dropdown_id: [option["value"] for option in values] for dropdown_id, values in self.options.items()}
+        stored["texts"] = {dropdown_id: {option["value"]: option["text"] for option in values}
+                           for dropdown_id, values in self.options.items()}
+        stored["fetched_at"] = self.fetched_at
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as json_file:
+            json.dump(stored, json_file, indent=4)
+        os.replace(temporary_path, self.path)
+
+    def has(self, dropdown_ids):
+        """True when every dropdown of `dropdown_ids` is stored with its option texts."""
+        return all(self.options.get(dropdown_id) and all(option["text"] is not None
+                                                         for option in self.options[dropdown_id])
+                   for dropdown_id in dropdown_ids)
+
+    def is_fresh(self, dropdown_ids):
+        """True when every dropdown of `dropdown_ids` was read less than `ttl` seconds ago."""
+        now = time.time()
+        return all(now - self.fetched_at.get(dropdown_id, 0.0) < self.ttl for dropdown_id in dropdown_ids)
+
+
+async def read_dropdown_options(engine, dropdown_ids, base_url=BASE_URL):
+    """
+    Reads {dropdown_id: [{"value", "text"}]} from the findamember page. An HTTP
+    engine whose page lacks the options falls back to Chromium.
+    """
+    url = base_url + "findamember"
+    try:
+        options = await engine.dropdown_values(url, dropdown_ids)
+    except Exception as e:
+        print(f"Error reading dropdowns: {e}")
+        options = {}
+    if not all(options.get(dropdown_id) for dropdown_id in dropdown_ids) and getattr(engine, "fallback", None):
+        options = await (await engine.fallback()).dropdown_values(url, dropdown_ids)
+    return options
+
+
+class DropdownDiscovery:
+    """
+    Dropdown options for a crawl without loading findamember on every run.
+    Options stored less than `cache.ttl` seconds ago are used as they are;
+    older ones are used straight away while the page is read again in the
+    background for the stale dropdowns, and only the differences are written back. Without stored
+    options (or their texts) the page is read before the crawl starts.
+    """
+
+    def __init__(self, cache=None, base_url=BASE_URL):
+        self.cache = cache if cache is not None else DropdownCache()
+        self.base_url = base_url
+        self._refresh = None
+
+    async def options(self, engine, dropdown_ids):
+        if not dropdown_ids:
+            return {}
+        if self.cache.load() and self.cache.has(dropdown_ids):
+            stale = [dropdown_id for dropdown_id in dropdown_ids if not self.cache.is_fresh([dropdown_id])]
+            if not stale:
+                print(f"Using the dropdown values in {self.cache.path}")
+            else:
+                print(f"Dropdown values {', '.join(stale)} in {self.cache.path} are stale, "
+                      f"refreshing them in the background")
+                self._refresh = asyncio.create_task(self.refresh(engine, stale))
+            return {dropdown_id: self.cache.options[dropdown_id] for dropdown_id in dropdown_ids}
+
+        await self.refresh(engine, dropdown_ids)
+        return {dropdown_id: self.cache.options.get(dropdown_id, []) for dropdown_id in dropdown_ids}
+
+    async def refresh(self, engine, dropdown_ids):
+        """Reads the findamember page and applies what changed to the stored options."""
+        new = await read_dropdown_options(engine, dropdown_ids, self.base_url)
+        if not any(new.values()):
+            print("No dropdown values read, keeping the stored ones")
+            return
+        diff = diff_options(self.cache.options, new)
+        for dropdown_id, changes in diff.items():
+            print(f"Dropdown {dropdown_id}: {len(changes['added'])} added, {len(changes['removed'])} removed, "
+                  f"{len(changes['renamed'])} renamed")
+        self.cache.options = apply_diff(self.cache.options, new, diff)
+        now = time.time()
+        for dropdown_id, new_options in new.items():
+            # An empty read keeps the stored options, and their time
+            if new_options:
+                self.cache.fetched_at[dropdown_id] = now
+        self.cache.save()
+        print(f"Dropdown values saved to {self.cache.path}")
+
+    async def wait(self):
+        """Waits for a background refresh; its failure only leaves the stored options as they were."""
+        if self._refresh is None:
+            return
+        try:
+            await self._refresh
+        except Exception as e:
+            print(f"Error refreshing the dropdown values: {e}")
+        self._refresh = None
@@ -0,0 +1,188 @@
+import asyncio
+import contextvars
+import os
+import random
+import time
+from collections import deque
+
+from .crawl_limits import limiter_slot
+from .page_cache import CacheMiss
+from .run_metrics import metrics
+
+# Page loads per second the crawl starts at, and the bounds the adaptive rate moves within
+DEFAULT_RATE = float(os.environ.get("BNI_RATE", 2))
+MIN_RATE = float(os.environ.get("BNI_MIN_RATE", 0.2))
+MAX_RATE = float(os.environ.get("BNI_MAX_RATE", 10))
+# Attempts per navigation before it is given up
+DEFAULT_ATTEMPTS = int(os.environ.get("BNI_RETRIES", 4))
+
+# Seconds of the running attempt that are not server latency (see exclude_from_latency)
+_excluded_seconds = contextvars.ContextVar("excluded_seconds", default=None)
+
+
+def exclude_from_latency(seconds):
+    """
+    Leaves `seconds` of the operation running under FetchController.run out of
+    its latency sample, e.g. a ready-element wait that timed out on a page
+    that simply lacks the element. Does nothing outside a controlled attempt.
+    """
+    excluded = _excluded_seconds.get()
+    if excluded is not None:
+        excluded[0] += seconds
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+def is_retryable(error):
+    """
+    Client errors (other than 408 and 429), cache-only misses and errors marked
+    `retryable = False` (such as a crashed browser page) are not worth retrying.
+    """
+    if isinstance(error, CacheMiss) or not getattr(error, "retryable", True):
+        return False
+    status = getattr(error, "status", None)
+    if isinstance(status, int) and 400 <= status < 500 and status not in (408, 429):
+        return False
+    return True
+
+
+def _retry_after(error):
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class FetchController:
+    """
+    Central gate for every navigation: a token bucket sets the request rate,
+    failures are retried with exponential backoff and full jitter, and the rate
+    adapts AIMD-style: it is cut when the recent error rate or latency rises and
+    grows back slowly with every successful request. The latency baseline is
+    the lowest smoothed latency seen, drifting up towards the current latency
+    by `baseline_decay` per sample, so a fast burst early on (or a slower page
+    type) does not make every later request count as slow. Latency only counts
+    as slow once it is also `min_slow_latency` seconds above the baseline, so
+    millisecond jitter on cached or local pages never cuts the rate.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE, attempts=DEFAULT_ATTEMPTS,
+                 base_delay=1.0, max_delay=60.0, window=20, max_error_rate=0.1, slow_factor=2.0,
+                 baseline_decay=0.05, min_slow_latency=0.05):
+        self.bucket = TokenBucket(min(max_rate, max(min_rate, rate)))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_error_rate = max_error_rate
+        self.slow_factor = slow_factor
+        self.baseline_decay = baseline_decay
+        self.min_slow_latency = min_slow_latency
+        self.outcomes = deque(maxlen=window)
+        self.latency = None
+        self.baseline_latency = None
+        self.retries = 0
+        self.failures = 0
+        self.slowdowns = 0
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def _set_rate(self, rate):
+        self.bucket.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.bucket.burst = max(1.0, self.bucket.rate)
+
+    def _record(self, ok, seconds=None):
+        self.outcomes.append(ok)
+        if seconds is not None:
+            self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+            if self.baseline_latency is None or self.latency < self.baseline_latency:
+                self.baseline_latency = self.latency
+            else:
+                self.baseline_latency += self.baseline_decay * (self.latency - self.baseline_latency)
+        error_rate = self.outcomes.count(False) / len(self.outcomes)
+        slow = (self.latency is not None and self.baseline_latency
+                and self.latency > self.slow_factor * self.baseline_latency
+                and self.latency - self.baseline_latency > self.min_slow_latency)
+        if len(self.outcomes) >= 5 and (error_rate > self.max_error_rate or slow):
+            self._set_rate(self.rate * 0.7)
+            self.slowdowns += 1
+            self.outcomes.clear()
+        elif ok:
+            self._set_rate(self.rate + 0.05)
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(self, url, operation, limiter=None):
+        """
+        Awaits `operation()` (a navigation or request for `url`) under the rate
+        limit, retrying retryable failures. Re-raises the last error.
+        """
+        for attempt in range(self.attempts):
+            with metrics.stage("rate_wait"):
+                await self.bucket.acquire()
+            excluded = [0.0]
+            token = _excluded_seconds.set(excluded)
+            try:
+                waiting = time.monotonic()
+                async with limiter_slot(limiter, url):
+                    # Latency excludes the wait for a limiter slot
+                    started = time.monotonic()
+                    metrics.observe("slot_wait", started - waiting)
+                    result = await operation()
+            except Exception as e:
+                self._record(False)
+                if attempt == self.attempts - 1 or not is_retryable(e):
+                    self.failures += 1
+                    metrics.count("failed_loads")
+                    raise
+                delay = max(self.backoff(attempt), _retry_after(e))
+                self.retries += 1
+                metrics.count("retries")
+                print(f"Attempt {attempt + 1} for {url} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            else:
+                self._record(True, max(0.0, time.monotonic() - started - excluded[0]))
+                return result
+            finally:
+                _excluded_seconds.reset(token)
+
+    def report(self):
+        latency = f"{self.latency:.2f}s" if self.latency is not None else "n/a"
+        print(f"Fetch control: rate {self.rate:.2f}/s, latency {latency}, "
+              f"{self.retries} retries, {self.failures} failed, {self.slowdowns} slowdowns")
+
+
+async def guarded(controller, limiter, url, operation):
+    """Runs `operation` through `controller` if there is one, else only under `limiter`."""
+    if controller is None:
+        async with limiter_slot(limiter, url):
+            return await operation()
+    return await controller.run(url, operation, limiter)
@@ -0,0 +1,318 @@
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+# Elements that never have children or an end tag
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+}
+
+# Opening one of these closes an unclosed element of the listed kinds, the way
+# browsers do for <li>, <p>, <td> and friends
+IMPLICIT_CLOSE = {
+    "li": {"li"},
+    "p": {"p"},
+    "option": {"option"},
+    "tr": {"tr", "td", "th"},
+    "td": {"td", "th"},
+    "th": {"td", "th"},
+    "thead": {"thead", "tbody", "tr", "td", "th"},
+    "tbody": {"thead", "tbody", "tr", "td", "th"},
+}
+
+# Elements whose text starts on a new line in innerText
+BLOCK_ELEMENTS = {
+    "address", "article", "div", "footer", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "li", "ol", "p", "section", "table", "tr", "ul",
+}
+
+SKIPPED_TEXT_ELEMENTS = {"script", "style", "template", "noscript"}
+
+# Words in a script (its source or src) or an element id that show a member table is built by scripts
+SCRIPTED_TABLE_MARKERS = ("memberlist", "datatable")
+_SCRIPT_PATTERN = re.compile(r"<script\b([^>]*)>(.*?)</script>", re.IGNORECASE | re.DOTALL)
+_ID_PATTERN = re.compile(r"\bid\s*=\s*[\"']?([^\"'\s>]+)", re.IGNORECASE)
+
+
+class Node:
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+        # Offsets of the inner HTML in the source document
+        self.inner_start = None
+        self.inner_end = None
+
+    @property
+    def classes(self):
+        return self.attrs.get("class", "").split()
+
+    def iter(self):
+        """Yields the descendant elements in document order."""
+        for child in self.children:
+            if isinstance(child, Node):
+                yield child
+                yield from child.iter()
+
+    def select(self, selector):
+        """Returns the descendants matching a descendant-combinator CSS selector."""
+        return select(self, selector)
+
+    def select_one(self, selector):
+        matches = select(self, selector)
+        return matches[0] if matches else None
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self, source):
+        super().__init__(convert_charrefs=True)
+        self.source = source
+        self.root = Node("#document", {}, None)
+        self.stack = [self.root]
+        self._line_offsets = [0]
+        for match in re.finditer("\n", source):
+            self._line_offsets.append(match.end())
+
+    def _offset(self):
+        line, column = self.getpos()
+        return self._line_offsets[line - 1] + column
+
+    def _close_until(self, tag):
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                end = self._offset()
+                for node in self.stack[index:]:
+                    if node.inner_end is None:
+                        node.inner_end = end
+                del self.stack[index:]
+                return
+
+    def handle_starttag(self, tag, attrs):
+        closes = IMPLICIT_CLOSE.get(tag)
+        if closes:
+            while self.stack[-1].tag in closes:
+                self._close_until(self.stack[-1].tag)
+        node = Node(tag, {name: value or "" for name, value in attrs}, self.stack[-1])
+        self.stack[-1].children.append(node)
+        node.inner_start = self._offset() + len(self.get_starttag_text() or "")
+        if tag in VOID_ELEMENTS:
+            node.inner_end = node.inner_start
+        else:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and self.stack[-1].tag == tag:
+            self._close_until(tag)
+
+    def handle_endtag(self, tag):
+        self._close_until(tag)
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+    def close(self):
+        super().close()
+        for node in self.stack[1:]:
+            if node.inner_end is None:
+                node.inner_end = len(self.source)
+
+
+def parse_html(html):
+    builder = _TreeBuilder(html)
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _parse_compound(part):
+    tag = None
+    match = re.match(r"[a-zA-Z][a-zA-Z0-9-]*", part)
+    if match:
+        tag = match.group(0).lower()
+    ids = re.findall(r"#([\w-]+)", part)
+    classes = re.findall(r"\.([\w-]+)", part)
+    return tag, ids, classes
+
+
+def _matches(node, compound):
+    tag, ids, classes = compound
+    if tag and node.tag != tag:
+        return False
+    if ids and node.attrs.get("id") not in ids:
+        return False
+    node_classes = node.classes
+    return all(name in node_classes for name in classes)
+
+
+def select(root, selector):
+    """
+    Supports the selectors the scrapers use: tag, #id and .class compounds
+    joined by descendant combinators, e.g. ".memberContactDetails .smUrls a".
+    """
+    compounds = [_parse_compound(part) for part in selector.split()]
+    matches = []
+    for node in root.iter():
+        if not _matches(node, compounds[-1]):
+            continue
+        remaining = len(compounds) - 2
+        ancestor = node.parent
+        while remaining >= 0 and ancestor is not None and ancestor is not root:
+            if _matches(ancestor, compounds[remaining]):
+                remaining -= 1
+            ancestor = ancestor.parent
+        if remaining < 0:
+            matches.append(node)
+    return matches
+
+
+def inner_html(node, source):
+    return source[node.inner_start:node.inner_end]
+
+
+def inner_text(node):
+    """Approximates HTMLElement.innerText: collapsed whitespace, <br> and blocks as newlines."""
+    parts = []
+
+    def walk(current):
+        for child in current.children:
+            if isinstance(child, str):
+                parts.append(re.sub(r"\s+", " ", child))
+            elif child.tag == "br":
+                parts.append("\n")
+            elif child.tag not in SKIPPED_TEXT_ELEMENTS:
+                block = child.tag in BLOCK_ELEMENTS
+                if block:
+                    parts.append("\n")
+                walk(child)
+                if block:
+                    parts.append("\n")
+
+    walk(node)
+    text = "".join(parts)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n+", "\n", text)
+    return text.strip()
+
+
+def _href(node, base_url):
+    href = node.attrs.get("href")
+    return urljoin(base_url, href.strip()) if href is not None else ""
+
+
+def _src(node, base_url):
+    src = node.attrs.get("src")
+    return urljoin(base_url, src.strip()) if src is not None else ""
+
+
+def parse_member_list(html, base_url):
+    """
+    Mirrors MEMBER_LIST_JS: the cells and first-column link of every
+    #memberListTable row after the header. Returns None when the page has
+    no member table at all, so callers can fall back to the browser.
+    """
+    root = parse_html(html)
+    if not root.select("#memberListTable"):
+        return None
+    rows = []
+    for row in root.select("#memberListTable tr")[1:]:
+        cells = row.select("td")
+        link = None
+        if cells:
+            anchor = cells[0].select_one("a")
+            if anchor is not None:
+                link = _href(anchor, base_url) or None
+        rows.append({"data": [inner_text(cell) for cell in cells], "link": link})
+    return rows
+
+
+def is_scripted_listing(html):
+    """
+    True when a memberlist page without #memberListTable looks like its table
+    is rendered by scripts: a script or an element id names the member list or
+    DataTables. A plain page such as "No members found." is an empty listing.
+    """
+    scripts = " ".join(attributes + source for attributes, source in _SCRIPT_PATTERN.findall(html)).lower()
+    ids = " ".join(_ID_PATTERN.findall(html)).lower()
+    return any(marker in scripts or marker in ids for marker in SCRIPTED_TABLE_MARKERS)
+
+
+def _is_next_link(anchor):
+    if "next" in anchor.attrs.get("rel", "").lower().split():
+        return True
+    parent = anchor.parent
+    return "next" in anchor.classes or (parent is not None and parent.tag == "li" and "next" in parent.classes)
+
+
+def next_page_url(html, base_url):
+    """
+    Mirrors NEXT_PAGE_JS: the absolute URL of the memberlist's next-page link
+    (rel="next", or a pager item with class "next"), or None on the last page
+    and for pagers driven by scripts rather than links.
+    """
+    root = parse_html(html)
+    for anchor in root.select("a"):
+        if not _is_next_link(anchor):
+            continue
+        parent = anchor.parent
+        if "disabled" in anchor.classes or (parent is not None and "disabled" in parent.classes):
+            return None
+        href = anchor.attrs.get("href", "").strip()
+        if not href or href.startswith("#") or href.lower().startswith("javascript:"):
+            return None
+        return urljoin(base_url, href)
+    return None
+
+
+def _at(values, index):
+    return values[index] if index < len(values) else ""
+
+
+def parse_member_details(html, base_url):
+    """
+    Mirrors MEMBER_DETAILS_JS for a member profile page: the profile cells of
+    a row, padded to DETAIL_CSV_HEADER.
+    """
+    root = parse_html(html)
+    phones = [inner_text(a) for a in root.select(".memberContactDetails li a")]
+    social_links = [_href(a, base_url) for a in root.select(".memberContactDetails .smUrls a")]
+    profile_photo_links = [_href(a, base_url) for a in root.select(".profilephoto a")]
+
+    address = " "
+    detail_element = root.select_one(".widgetMemberCompanyDetail h6")
+    if detail_element is not None:
+        address = inner_html(detail_element, html)
+        address = re.sub(r"<br\s*/?>", ", ", address)
+        address = address.replace("</h6>", "").replace("<h6>", "").strip()
+
+    company_website = " "
+    website_element = root.select_one(".memberProfileInfo p a")
+    if website_element is not None:
+        company_website = _href(website_element, base_url).strip()
+
+    company_logo = " "
+    logo_element = root.select_one(".companyLogo img")
+    if logo_element is not None:
+        company_logo = _src(logo_element, base_url).strip()
+
+    return [
+        _at(phones, 0), _at(phones, 1), _at(phones, 2),
+        _at(social_links, 0), _at(social_links, 1), _at(social_links, 2),
+        _at(profile_photo_links, 0), address, company_website, company_logo,
+    ]
+
+
+def parse_dropdown_options(html, dropdown_id):
+    """Mirrors the dropdown evaluate in main(): value/text of the non-empty options."""
+    root = parse_html(html)
+    options = []
+    for option in root.select(f"#{dropdown_id} option"):
+        value = option.attrs.get("value")
+        text = inner_text(option)
+        if value is None:
+            value = text
+        if value.strip():
+            options.append({"value": value.strip(), "text": text})
+    return options
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .html_extract import (is_scripted_listing, next_page_url, parse_dropdown_options, parse_member_details,
+                           parse_member_list)
+from .fetch_control import guarded
+from .member_pool import DEFAULT_CONCURRENCY, MAX_LIST_PAGES
+from .page_cache import CACHE_ONLY, CacheMiss
+from .run_metrics import metrics
+
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def page_type_of(url):
+    """findamember, memberlist or profile, from the last segment of the URL path."""
+    name = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1].lower()
+    return name if name in ("findamember", "memberlist") else "profile"
+
+
+def create_session(concurrency=DEFAULT_CONCURRENCY, timeout=60):
+    """Returns an aiohttp session whose connection pool matches the crawl concurrency."""
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, ssl=False)
+    return aiohttp.ClientSession(connector=connector, headers=HEADERS,
+                                 timeout=aiohttp.ClientTimeout(total=timeout))
+
+
+async def fetch_html(session, url, cache=None, limiter=None, controller=None):
+    """
+    GETs `url`, going through `cache` (a PageCache) when given: fresh entries are
+    returned without a request and stale ones are revalidated with their validators.
+    Only actual requests take a slot from `limiter` and go through `controller`
+    (a FetchController) for rate limiting and retries.
+    """
+    entry = cache.get(url) if cache is not None else None
+    if entry is not None and (CACHE_ONLY or cache.is_fresh(entry)):
+        cache.hits += 1
+        metrics.count("cache_hits")
+        return entry.body.decode("utf-8", errors="replace")
+    if cache is not None and CACHE_ONLY:
+        raise CacheMiss(url)
+
+    headers = entry.conditional_headers() if entry is not None else {}
+
+    async def request():
+        started = time.perf_counter()
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and entry is not None:
+                metrics.record_load(url, page_type_of(url), time.perf_counter() - started, 0, 304)
+                cache.mark_revalidated(url)
+                return entry.body.decode("utf-8", errors="replace")
+            response.raise_for_status()
+            body = await response.read()
+            seconds = time.perf_counter() - started
+            metrics.observe("navigation", seconds)
+            metrics.record_load(url, page_type_of(url), seconds, len(body), response.status)
+            text = body.decode(response.charset or "utf-8", errors="replace")
+            if cache is not None:
+                cache.put(url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return text
+
+    return await guarded(controller, limiter, url, request)
+
+
+class HttpEngine:
+    """
+    Reads memberlist and profile pages with plain HTTP requests and parses them
+    with html_extract, producing the same rows as BrowserEngine. `fallback` is an
+    optional coroutine function returning a BrowserEngine; it is only awaited when
+    a page cannot be read without running its JavaScript. `cache` is an optional
+    PageCache shared by every request, `limiter` an optional CrawlLimiter and
+    `controller` an optional FetchController.
+    """
+
+    def __init__(self, session, fallback=None, cache=None, limiter=None, controller=None):
+        self.session = session
+        self.fallback = fallback
+        self.cache = cache
+        self.limiter = limiter
+        self.controller = controller
+        self.fallback_pages = 0
+
+    async def _fallback_engine(self, reason):
+        if self.fallback is None:
+            return None
+        print(f"Falling back to Chromium: {reason}")
+        return await self.fallback()
+
+    async def dropdown_values(self, url, dropdown_ids):
+        """Returns {dropdown_id: [{"value", "text"}, ...]} read from the findamember page."""
+        html = await fetch_html(self.session, url, self.cache, self.limiter, self.controller)
+        return {dropdown_id: parse_dropdown_options(html, dropdown_id) for dropdown_id in dropdown_ids}
+
+    async def listing_rows(self, url):
+        """Rows of every page of the memberlist at `url`, following next-page links up to MAX_LIST_PAGES."""
+        rows = []
+        seen = set()
+        page_url = url
+        while page_url and page_url not in seen and len(seen) < MAX_LIST_PAGES:
+            seen.add(page_url)
+            html = await fetch_html(self.session, page_url, self.cache, self.limiter, self.controller)
+            with metrics.stage("parse"):
+                page_rows = parse_member_list(html, page_url)
+                next_url = next_page_url(html, page_url)
+            if page_rows is None:
+                if not is_scripted_listing(html):
+                    # No table and nothing that would build one: an empty listing
+                    return rows
+                # The table is rendered by scripts: the browser reads the whole listing
+                engine = await self._fallback_engine(f"no #memberListTable in {page_url}")
+                if engine is not None:
+                    self.fallback_pages += 1
+                    return await engine.listing_rows(url)
+                return rows
+            rows += page_rows
+            page_url = next_url
+        if len(seen) > 1:
+            print(f"Read {len(rows)} rows from {len(seen)} memberlist pages")
+        return rows
+
+    async def profile_details(self, link):
+        """The padded profile cells of one member; a profile that fails over HTTP is read through the fallback."""
+        try:
+            html = await fetch_html(self.session, link, self.cache, self.limiter, self.controller)
+        except CacheMiss:
+            raise
+        except Exception as e:
+            engine = await self._fallback_engine(f"{link} failed over HTTP: {e}")
+            if engine is None:
+                raise
+            self.fallback_pages += 1
+            return await engine.profile_details(link)
+        with metrics.stage("parse"):
+            return parse_member_details(html, link)
+
+    async def member_details(self, rows, concurrency=DEFAULT_CONCURRENCY):
+        """
+        Same contract as BrowserEngine.member_details: (row, details) tuples in
+        the order of `rows`. Profiles that fail over HTTP are fetched again
+        through the fallback.
+        """
+        rows = [row for row in rows if row.get('link')]
+        results = [None] * len(rows)
+        queue = asyncio.Queue()
+        for index, row in enumerate(rows):
+            queue.put_nowait((index, row))
+
+        async def worker():
+            while True:
+                try:
+                    index, row = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    html = await fetch_html(self.session, row['link'], self.cache, self.limiter, self.controller)
+                    with metrics.stage("parse"):
+                        results[index] = parse_member_details(html, row['link'])
+                except Exception as e:
+                    print(f"Error fetching member details from {row['link']}: {e}")
+                finally:
+                    queue.task_done()
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(rows))))))
+
+        failed = [index for index, details in enumerate(results) if details is None]
+        if failed:
+            engine = await self._fallback_engine(f"{len(failed)} profiles failed over HTTP")
+            if engine is not None:
+                self.fallback_pages += len(failed)
+                retried = await engine.member_details([rows[index] for index in failed], concurrency)
+                for index, (_, details) in zip(failed, retried):
+                    results[index] = details
+        return list(zip(rows, results))
@@ -0,0 +1,173 @@
+"""
+Refreshes a snapshot of the whole membership without crawling it again.
+Every chapter's memberlist is read (one page per chapter, as in
+the chapters mode) and each row is compared with the previous snapshot
+through a fingerprint of its cells; only new and changed members get their
+profile page fetched. The updated snapshot replaces the old one and the
+differences are written to a delta file next to it:
+
+    python -m bni_scraper incremental                     # members_snapshot.csv
+    python -m bni_scraper incremental --snapshot weekly.csv --engine http
+
+The delta file (<snapshot>.delta_<timestamp>.csv) has a Change column
+(added, changed or removed) in front of the member columns. The first run,
+without a snapshot, reports every member as added.
+"""
+import argparse
+import asyncio
+import csv
+import os
+import time
+
+from .browser import open_engine
+from .crawl_limits import CrawlLimiter
+from .crawl_plan import memberlist_url
+from .dedup_index import key_digest, member_key
+from .discovery import DropdownDiscovery
+from .fetch_control import FetchController
+from .member_pool import MEMBER_CSV_HEADER, build_detailed_row
+from .page_cache import open_page_cache
+from .row_sink import CsvSink
+from .run_metrics import metrics
+
+SNAPSHOT_HEADER = MEMBER_CSV_HEADER + ["ProfileLink", "ListingFingerprint"]
+DELTA_HEADER = ["Change"] + MEMBER_CSV_HEADER + ["ProfileLink"]
+# Number of memberlist cells at the start of a member row
+LISTING_WIDTH = MEMBER_CSV_HEADER.index("Phone1")
+
+
+def row_fingerprint(data):
+    """Hex digest of the memberlist cells of a member, ignoring case and spacing."""
+    cells = "\x1f".join(" ".join(str(cell).split()).lower() for cell in data[:LISTING_WIDTH])
+    return format(key_digest(cells), "016x")
+
+
+def load_snapshot(path):
+    """Returns {member key: (fingerprint, row, link)} of the snapshot at `path` (empty if there is none)."""
+    snapshot = {}
+    try:
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            width = len(MEMBER_CSV_HEADER)
+            for record in reader:
+                if len(record) < width + 2:
+                    continue
+                row, link, fingerprint = record[:width], record[width], record[width + 1]
+                snapshot[member_key(link or None, row)] = (fingerprint, row, link)
+    except FileNotFoundError:
+        print(f"No snapshot at {path}, every member counts as added.")
+    return snapshot
+
+
+async def refresh_snapshot(engine, snapshot, concurrency):
+    """
+    Lists every chapter and fetches the profiles of new and changed members.
+    Returns (members, delta): the refreshed {key: (fingerprint, row, link)} and
+    a list of (change, row, link). Members of chapters whose listing failed
+    are kept as they were rather than reported as removed.
+    """
+    members = {}
+    delta = []
+    unreadable_chapters = set()
+    discovery = DropdownDiscovery()
+    chapters = [option["value"] for option in (await discovery.options(engine, ["chapterName"]))["chapterName"]]
+    for chapter in chapters:
+        url = memberlist_url(chapter)
+        try:
+            listing = await engine.listing_rows(url)
+        except Exception as e:
+            print(f"Error reading chapter {chapter}, keeping its members from the snapshot: {e}")
+            unreadable_chapters.add(chapter)
+            continue
+
+        pending = []
+        for row in listing:
+            key = member_key(row['link'], row['data'])
+            if key in members:
+                continue
+            fingerprint = row_fingerprint(row['data'])
+            previous = snapshot.get(key)
+            if previous is not None and previous[0] == fingerprint:
+                members[key] = previous
+            else:
+                pending.append((key, fingerprint, row, "added" if previous is None else "changed"))
+        print(f"Chapter {chapter}: {len(listing)} listed, {len(pending)} new or changed")
+
+        fetched = await engine.member_details([row for _, _, row, _ in pending], concurrency)
+        details_by_link = {row['link']: details for row, details in fetched}
+        for key, fingerprint, row, change in pending:
+            details = details_by_link.get(row['link'])
+            if details is None:
+                # Keep the old row (with its old fingerprint, so the next run tries again)
+                if key in snapshot:
+                    members[key] = snapshot[key]
+                continue
+            detailed_row = build_detailed_row(row['data'], details)
+            members[key] = (fingerprint, detailed_row, row['link'] or "")
+            delta.append((change, detailed_row, row['link'] or ""))
+
+    for key, (fingerprint, row, link) in snapshot.items():
+        if key in members:
+            continue
+        # The chapter of a snapshot row is not stored, so an unreadable chapter keeps every missing member
+        if unreadable_chapters:
+            members[key] = (fingerprint, row, link)
+        else:
+            delta.append(("removed", row, link))
+    await discovery.wait()
+    return members, delta
+
+
+def write_snapshot(path, members):
+    """Writes the snapshot to a temporary file first, so a crash never leaves half a snapshot."""
+    temporary_path = path + ".tmp"
+    if os.path.exists(temporary_path):
+        os.remove(temporary_path)
+    with CsvSink(temporary_path, header=SNAPSHOT_HEADER) as sink:
+        for fingerprint, row, link in members.values():
+            sink.write(list(row) + [link, fingerprint], link)
+    os.replace(temporary_path, path)
+
+
+def write_delta(snapshot_path, delta):
+    delta_path = f"{os.path.splitext(snapshot_path)[0]}.delta_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+    with CsvSink(delta_path, header=DELTA_HEADER) as sink:
+        for change, row, link in delta:
+            sink.write([change] + list(row) + [link], link)
+    return delta_path
+
+
+async def run(options):
+    snapshot = load_snapshot(options.snapshot)
+    limiter = CrawlLimiter(options.concurrency, options.concurrency)
+    controller = FetchController()
+    cache = open_page_cache()
+    try:
+        async with open_engine(options.engine, options.concurrency, cache, limiter, controller) as engine:
+            members, delta = await refresh_snapshot(engine, snapshot, options.concurrency)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    write_snapshot(options.snapshot, members)
+    delta_path = write_delta(options.snapshot, delta)
+    counts = {change: sum(1 for item in delta if item[0] == change) for change in ("added", "changed", "removed")}
+    print(f"Snapshot {options.snapshot}: {len(members)} members; "
+          f"{counts['added']} added, {counts['changed']} changed, {counts['removed']} removed (see {delta_path})")
+    controller.report()
+    metrics.print_summary()
+    metrics.save_report(os.path.splitext(options.snapshot)[0] + ".report.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh a membership snapshot, fetching only new and changed members.")
+    parser.add_argument("--snapshot", default="members_snapshot.csv", help="snapshot CSV to compare with and update")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("BNI_CONCURRENCY", 4)),
+                        help="profile pages in flight")
+    parser.add_argument("--engine", choices=["browser", "http"], default=os.environ.get("BNI_ENGINE", "browser"))
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import asyncio
+import os
+import weakref
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from .fetch_control import guarded
+from .page_ready import PageCrashed, goto_ready, is_crash
+from .run_metrics import metrics
+
+# Number of member profile pages opened in parallel by default
+DEFAULT_CONCURRENCY = 4
+# Most memberlist pages followed through next-page links for one listing
+MAX_LIST_PAGES = int(os.environ.get("BNI_MAX_LIST_PAGES", 500))
+# Times a listing or profile is re-queued on a fresh page after its page or browser crashed
+CRASH_RETRIES = int(os.environ.get("BNI_CRASH_RETRIES", 2))
+# Milliseconds to wait for more rows after scrolling a memberlist to the bottom; 0 never scrolls
+SCROLL_WAIT = int(os.environ.get("BNI_SCROLL_WAIT", 1000))
+# Milliseconds the first scroll waits for rows when no loader is shown, to tell infinite scroll from a long page
+SCROLL_PROBE = int(os.environ.get("BNI_SCROLL_PROBE", 250))
+
+# Columns of a row built by build_detailed_row
+MEMBER_CSV_HEADER = [
+    "MemberName", "Region", "City", "Street", "Profession", "Company",
+    "Phone1", "Phone2", "Phone3", "SocialMedia1", "SocialMedia2", "SocialMedia3",
+    "ProfilePhotoLink", "Address", "CompanyWebsite", "CompanyLogo"
+]
+
+# Columns appended to the memberlist cells from the profile page
+DETAIL_CSV_HEADER = MEMBER_CSV_HEADER[6:]
+
+# Registered once per context as an init script, so every page has the extractors
+# compiled before any navigation; each member then costs one short evaluate call
+# that returns the row cells already padded to DETAIL_CSV_HEADER.
+EXTRACTORS_JS = '''
+    window.__bniExtract = {
+        isDataTable() {
+            const jq = window.jQuery;
+            return Boolean(jq && jq.fn && jq.fn.dataTable && jq.fn.dataTable.isDataTable("#memberListTable"));
+        },
+        listRows() {
+            // A DataTables table only keeps its current page in the DOM; its API has every row
+            if (this.isDataTable()) {
+                return Array.from(window.jQuery("#memberListTable").DataTable().rows().nodes());
+            }
+            return Array.from(document.querySelectorAll("#memberListTable tr")).slice(1);  // Skip the header row
+        },
+        rowCount() {
+            return this.listRows().length;
+        },
+        nextPage() {
+            const anchors = Array.from(document.querySelectorAll("a")).filter(a =>
+                (a.getAttribute("rel") || "").toLowerCase().split(/\\s+/).includes("next")
+                || a.classList.contains("next")
+                || (a.parentElement?.tagName === "LI" && a.parentElement.classList.contains("next")));
+            const anchor = anchors[0];
+            if (!anchor || anchor.classList.contains("disabled")
+                || anchor.parentElement?.classList.contains("disabled")) {
+                return null;
+            }
+            const href = (anchor.getAttribute("href") || "").trim();
+            if (!href || href.startsWith("#") || href.toLowerCase().startsWith("javascript:")) {
+                return null;
+            }
+            return anchor.href;
+        },
+        mayScroll() {
+            // Paged and DataTables listings are read without scrolling
+            if (this.isDataTable() || this.nextPage()) {
+                return false;
+            }
+            return document.documentElement.scrollHeight > window.innerHeight + 1;
+        },
+        hasScrollLoader() {
+            return document.querySelector(
+                '[data-infinite-scroll], [class*="infinite"], [class*="load-more"], [class*="loading"], [class*="spinner"]'
+            ) !== null;
+        },
+        memberList() {
+            return this.listRows()
+                .map(row => {
+                    const cells = Array.from(row.querySelectorAll("td"));
+                    const link = cells[0]?.querySelector("a")?.href || null;
+                    return {
+                        data: cells.map(cell => cell.innerText.trim()),
+                        link
+                    };
+                });
+        },
+        memberDetails() {
+            const at = (list, index) => list[index] || "";
+            const phones = Array.from(document.querySelectorAll(".memberContactDetails li a"))
+                .map(el => el.innerText.trim());
+            const socialLinks = Array.from(
+                document.querySelectorAll(".memberContactDetails .smUrls a")
+            ).map(a => a.href);
+            const profilePhotoLinks = Array.from(document.querySelectorAll(".profilephoto a"))
+                .map(a => a.href);
+            const detailElement = document.querySelector(".widgetMemberCompanyDetail h6");
+            let address = " ";
+            if (detailElement) {
+                address = detailElement.innerHTML
+                    .replace(/<br\\s*\\/?>/g, ", ")
+                    .replace(/<\\/h6>/g, "")
+                    .replace(/<h6>/g, "")
+                    .trim();
+            }
+            const websiteElement = document.querySelector(".memberProfileInfo p a");
+            const companyWebsite = websiteElement ? websiteElement.href.trim() : " ";
+            const logoElement = document.querySelector(".companyLogo img");
+            const companyLogo = logoElement ? logoElement.src.trim() : " ";
+            return [
+                at(phones, 0), at(phones, 1), at(phones, 2),
+                at(socialLinks, 0), at(socialLinks, 1), at(socialLinks, 2),
+                at(profilePhotoLinks, 0), address, companyWebsite, companyLogo
+            ];
+        }
+    };
+'''
+
+MEMBER_LIST_JS = "() => window.__bniExtract.memberList()"
+NEXT_PAGE_JS = "() => window.__bniExtract.nextPage()"
+MEMBER_DETAILS_JS = "() => window.__bniExtract.memberDetails()"
+
+# Contexts that already have EXTRACTORS_JS registered
+_extractor_contexts = weakref.WeakSet()
+
+
+async def install_extractors(context):
+    """Registers EXTRACTORS_JS on `context` once; later navigations of all its pages get it."""
+    if context not in _extractor_contexts:
+        _extractor_contexts.add(context)
+        await context.add_init_script(EXTRACTORS_JS)
+
+
+def build_detailed_row(data, details):
+    """
+    Appends the profile cells (already padded to DETAIL_CSV_HEADER by
+    MEMBER_DETAILS_JS or html_extract) to the memberlist cells.
+    """
+    with metrics.stage("row_assembly"):
+        return [*data, *details]
+
+
+class ContextPages:
+    """The default page pool of a BrowserEngine: pages of one context, reused as they are released."""
+
+    def __init__(self, context, pages=()):
+        self.context = context
+        self._idle = list(pages)
+
+    async def acquire(self):
+        while self._idle:
+            page = self._idle.pop()
+            if not page.is_closed():
+                return page
+        return await self.context.new_page()
+
+    async def release(self, page, crashed=False):
+        if crashed or page.is_closed():
+            try:
+                await page.close()
+            except Exception:
+                pass
+            return
+        self._idle.append(page)
+
+
+class BrowserEngine:
+    """
+    Reads memberlist and profile pages through Playwright pages. Every listing
+    and profile borrows a page from `pages` (ContextPages of `page`'s context
+    by default, or a recycling pool such as browser.PagePool), so several can
+    be in flight at once. Work whose page or browser crashed is re-queued on a
+    fresh page up to CRASH_RETRIES times.
+    """
+
+    def __init__(self, page=None, limiter=None, controller=None, pages=None):
+        self.pages = pages if pages is not None else ContextPages(page.context, [page])
+        self.limiter = limiter
+        self.controller = controller
+
+    async def _with_page(self, operation):
+        """Awaits `operation(page)` on a borrowed page."""
+        for attempt in range(CRASH_RETRIES + 1):
+            page = None
+            try:
+                page = await self.pages.acquire()
+                await install_extractors(page.context)
+                result = await operation(page)
+            except Exception as e:
+                crashed = is_crash(page, e)
+                if page is not None:
+                    await self.pages.release(page, crashed)
+                if not crashed or attempt == CRASH_RETRIES:
+                    raise
+                metrics.count("page_crashes")
+                print(f"Browser page crashed ({e}), re-queueing the work on a fresh page")
+                continue
+            await self.pages.release(page)
+            return result
+
+    async def _goto(self, page, url, page_type):
+        await guarded(self.controller, self.limiter, url, lambda: goto_ready(page, url, page_type))
+
+    async def dropdown_values(self, url, dropdown_ids):
+        """Returns {dropdown_id: [{"value", "text"}, ...]} read from the findamember page."""
+
+        async def read_dropdowns(page):
+            await self._goto(page, url, "findamember")
+            return {
+                dropdown_id: await page.evaluate('''
+                    (dropdownId) => Array.from(document.querySelectorAll("#" + dropdownId + " option"))
+                        .map(option => ({
+                            value: option.value.trim(),
+                            text: option.innerText.trim()
+                        }))
+                        .filter(option => option.value !== "")
+                ''', dropdown_id)
+                for dropdown_id in dropdown_ids
+            }
+
+        return await self._with_page(read_dropdowns)
+
+    async def _scroll_for_rows(self, page):
+        """
+        Scrolls an infinite-scroll memberlist to the bottom until no more rows
+        load. Pages with a next-page link or a DataTables table are not scrolled,
+        and unless a loader is shown the first scroll only waits SCROLL_PROBE for
+        new rows, so a long static page costs one short probe.
+        """
+        if SCROLL_WAIT <= 0 or not await page.evaluate("() => window.__bniExtract.mayScroll()"):
+            return
+        if await page.evaluate("() => window.__bniExtract.hasScrollLoader()"):
+            timeout = SCROLL_WAIT
+        else:
+            timeout = min(SCROLL_PROBE, SCROLL_WAIT)
+        while True:
+            count = await page.evaluate("() => window.__bniExtract.rowCount()")
+            await page.evaluate("() => window.scrollTo(0, document.documentElement.scrollHeight)")
+            try:
+                await page.wait_for_function("(count) => window.__bniExtract.rowCount() > count", arg=count,
+                                             timeout=timeout)
+            except PlaywrightTimeoutError:
+                return
+            # Rows arrived: this is infinite scroll, so later batches get the full wait
+            timeout = SCROLL_WAIT
+
+    async def listing_rows(self, url):
+        """
+        Rows of every page of the memberlist at `url`: lazily loaded batches are
+        scrolled in and next-page links followed, up to MAX_LIST_PAGES pages.
+        """
+
+        async def read_listing(page):
+            rows = []
+            seen = set()
+            page_url = url
+            while page_url and page_url not in seen and len(seen) < MAX_LIST_PAGES:
+                seen.add(page_url)
+                await self._goto(page, page_url, "memberlist")
+                await self._scroll_for_rows(page)
+                with metrics.stage("evaluate"):
+                    rows += await page.evaluate(MEMBER_LIST_JS)
+                    page_url = await page.evaluate(NEXT_PAGE_JS)
+            if len(seen) > 1:
+                print(f"Read {len(rows)} rows from {len(seen)} memberlist pages")
+            return rows
+
+        return await self._with_page(read_listing)
+
+    async def profile_details(self, link):
+        """The padded profile cells of one member (see MEMBER_DETAILS_JS); raises if the page cannot be read."""
+
+        async def read_profile(page):
+            async def load_profile():
+                await goto_ready(page, link, "profile")
+                try:
+                    with metrics.stage("evaluate"):
+                        return await page.evaluate(MEMBER_DETAILS_JS)
+                except Exception as e:
+                    if is_crash(page, e):
+                        raise PageCrashed(link) from e
+                    raise
+
+            return await guarded(self.controller, self.limiter, link, load_profile)
+
+        return await self._with_page(read_profile)
+
+    async def member_details(self, rows, concurrency=DEFAULT_CONCURRENCY):
+        """
+        Fetches the profile of every row with a link, `concurrency` at a time on
+        pages borrowed from the pool. Returns (row, details) tuples in the order
+        of `rows`; details is None when the profile could not be loaded.
+        """
+        rows = [row for row in rows if row.get('link')]
+        results = [None] * len(rows)
+        queue = asyncio.Queue()
+        for index, row in enumerate(rows):
+            queue.put_nowait((index, row))
+
+        async def worker():
+            while True:
+                try:
+                    index, row = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    results[index] = await self.profile_details(row['link'])
+                except Exception as e:
+                    print(f"Error extracting member details from {row['link']}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(rows))))))
+        return list(zip(rows, results))
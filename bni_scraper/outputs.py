@@ -0,0 +1,122 @@
+import os
+import time
+
+from .member_pool import MEMBER_CSV_HEADER
+from .row_sink import open_output_sinks
+
+
+def new_run_id():
+    """BNI_RUN_ID, or the start time of the run as YYYYmmdd_HHMMSS."""
+    return os.environ.get("BNI_RUN_ID") or time.strftime("%Y%m%d_%H%M%S")
+
+
+def run_output_path(base, extension="", run_id=None):
+    """
+    <base>_<run id><extension>, named in one step instead of probing base1,
+    base2, ... The process id is added if another run of the same second
+    already took the name.
+    """
+    run_id = run_id or new_run_id()
+    path = f"{base}_{run_id}{extension}"
+    if os.path.exists(path):
+        path = f"{base}_{run_id}_{os.getpid()}{extension}"
+    return path
+
+
+class SingleFileOutput:
+    """
+    Every member in one output (the CSV at `path` plus any extra
+    BNI_OUTPUT_FORMATS next to it). With `with_link` the profile link is
+    appended as a last ProfileLink column. With `auto_flush` off rows are only
+    written when `flush` is called, as a checkpoint journal does before it syncs.
+    """
+
+    name = "single"
+
+    def __init__(self, path, header=MEMBER_CSV_HEADER, formats=None, with_link=False, auto_flush=True):
+        self.path = path
+        self.with_link = with_link
+        header = list(header) + (["ProfileLink"] if with_link else [])
+        self.sink = open_output_sinks(path, header, formats, auto_flush=auto_flush)
+
+    def begin(self, item):
+        pass
+
+    def write(self, item, row, link=None):
+        self.sink.write(list(row) + [link or ""] if self.with_link else row, link)
+
+    def finish(self, item):
+        pass
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        self.sink.close()
+
+    def report(self):
+        self.sink.report()
+
+
+class PerChapterOutput:
+    """
+    One output per work item, named after its label, inside `folder`; rows are
+    numbered in a leading Count column. A work item's files are closed when it
+    is finished and reopened for appending if more of its rows arrive later.
+    """
+
+    name = "per_chapter"
+
+    def __init__(self, folder, header=MEMBER_CSV_HEADER, formats=None):
+        self.folder = folder
+        self.header = ["Count"] + list(header)
+        self.formats = formats
+        os.makedirs(folder, exist_ok=True)
+        print(f"Created new folder: {folder}")
+        self.sinks = {}
+        self.counts = {}
+        self.finished = []
+
+    def path(self, item):
+        file_name = item.label.replace(" ", "_").replace("/", "_")
+        return os.path.join(self.folder, f"{file_name}.csv")
+
+    def _sink(self, item):
+        if item.label not in self.sinks:
+            self.sinks[item.label] = open_output_sinks(self.path(item), self.header, self.formats)
+        return self.sinks[item.label]
+
+    def begin(self, item):
+        self._sink(item)
+        print(f"Created CSV file for chapter: {self.path(item)}")
+
+    def write(self, item, row, link=None):
+        count = self.counts.get(item.label, 0) + 1
+        self.counts[item.label] = count
+        self._sink(item).write([count] + list(row), link)
+
+    def finish(self, item):
+        sink = self.sinks.pop(item.label, None)
+        if sink is not None:
+            sink.close()
+            self.finished.append(sink)
+
+    def flush(self):
+        for sink in self.sinks.values():
+            sink.flush()
+
+    def close(self):
+        for label in list(self.sinks):
+            sink = self.sinks.pop(label)
+            sink.close()
+            self.finished.append(sink)
+
+    def report(self):
+        for sink in self.finished:
+            sink.report()
+
+
+OUTPUTS = {
+    SingleFileOutput.name: SingleFileOutput,
+    PerChapterOutput.name: PerChapterOutput,
+}
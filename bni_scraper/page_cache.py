@@ -0,0 +1,191 @@
+import os
+import sqlite3
+import time
+import zlib
+from urllib.parse import quote
+
+# SQLite file holding the cached pages; BNI_CACHE=0 turns caching off
+CACHE_PATH = os.environ.get("BNI_CACHE", "page_cache.sqlite")
+CACHE_ENABLED = CACHE_PATH not in ("", "0")
+# Seconds a cached page is used without asking the server again
+CACHE_TTL = int(os.environ.get("BNI_CACHE_TTL", 7 * 24 * 3600))
+# Least recently used pages are evicted once the compressed bodies exceed this size
+CACHE_MAX_BYTES = int(os.environ.get("BNI_CACHE_MAX_MB", 500)) * 1024 * 1024
+# BNI_CACHE_ONLY=1 replays a run from the cache without touching the network
+CACHE_ONLY = os.environ.get("BNI_CACHE_ONLY", "0") == "1"
+
+
+# Characters left as they are when a URL is turned into a cache key: the reserved
+# ones, "%" so existing escapes stay, and those Chromium does not escape either
+_KEY_SAFE_CHARACTERS = "!#$%&'()*+,/:;=?@[]~"
+
+
+def cache_key(url):
+    """
+    `url` percent-encoded the way Chromium sends it, so "chapterCity=Business Bay"
+    and the "chapterCity=Business%20Bay" a browser route sees share one entry.
+    """
+    return quote(url, safe=_KEY_SAFE_CHARACTERS)
+
+
+class CacheMiss(Exception):
+    """Raised in cache-only mode when a URL is not in the cache."""
+
+
+class CacheEntry:
+    def __init__(self, url, body, etag, last_modified, fetched_at):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    URL-keyed store of zlib-compressed page bodies in SQLite, with a freshness
+    TTL, ETag/Last-Modified validators and size-based LRU eviction. URLs are
+    stored under their cache_key.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        # Access times are written in batches so reads never hold the write lock
+        self._touched = {}
+        # Several crawl processes may share one cache file
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.connection.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+        self.connection.commit()
+        self.total_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def get(self, url):
+        url = cache_key(url)
+        row = self.connection.execute(
+            "SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self._touched[url] = time.time()
+        return CacheEntry(url, zlib.decompress(row[0]), row[1], row[2], row[3])
+
+    def is_fresh(self, entry):
+        return time.time() - entry.fetched_at < self.ttl
+
+    def _write_touches(self):
+        if self._touched:
+            self.connection.executemany("UPDATE pages SET accessed_at = ? WHERE url = ?",
+                                        [(accessed_at, url) for url, accessed_at in self._touched.items()])
+            self._touched = {}
+
+    def put(self, url, body, etag=None, last_modified=None):
+        url = cache_key(url)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        compressed = zlib.compress(body, 6)
+        now = time.time()
+        previous = self.connection.execute("SELECT size FROM pages WHERE url = ?", (url,)).fetchone()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO pages (url, body, size, etag, last_modified, fetched_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, compressed, len(compressed), etag, last_modified, now, now),
+        )
+        self.total_bytes += len(compressed) - (previous[0] if previous else 0)
+        self._write_touches()
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+        self.connection.commit()
+
+    def mark_revalidated(self, url):
+        """Restarts the TTL of an entry after the server answered 304 Not Modified."""
+        url = cache_key(url)
+        self.revalidated += 1
+        now = time.time()
+        self.connection.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+        self.connection.commit()
+
+    def evict(self):
+        """Drops least recently used pages until the cache is back under 90% of max_bytes."""
+        target = self.max_bytes * 0.9
+        rows = self.connection.execute("SELECT url, size FROM pages ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if self.total_bytes <= target:
+                break
+            self.connection.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self.total_bytes -= size
+
+    def report(self):
+        print(f"Page cache {self.path}: {self.hits} hits, {self.misses} misses, "
+              f"{self.revalidated} revalidated, {self.total_bytes / 1024 / 1024:.1f} MB stored")
+
+    def close(self):
+        self._write_touches()
+        self.connection.commit()
+        self.connection.close()
+
+
+def open_page_cache():
+    """Returns the PageCache configured through BNI_CACHE*, or None when caching is off."""
+    return PageCache() if CACHE_ENABLED else None
+
+
+async def install_page_cache(context, cache, cache_only=CACHE_ONLY):
+    """
+    Serves document requests of a Playwright context from `cache`. Stale pages are
+    revalidated with If-None-Match/If-Modified-Since; other requests fall through
+    to the routes registered before this one (such as resource blocking).
+    """
+
+    async def handle_route(route):
+        request = route.request
+        if request.resource_type != "document" or request.method != "GET":
+            await route.fallback()
+            return
+        entry = cache.get(request.url)
+        if entry is not None and (cache_only or cache.is_fresh(entry)):
+            cache.hits += 1
+            await route.fulfill(status=200, body=entry.body, content_type="text/html; charset=utf-8")
+            return
+        if cache_only:
+            print(f"Not in cache: {request.url}")
+            await route.abort()
+            return
+
+        headers = dict(request.headers)
+        if entry is not None:
+            headers.update(entry.conditional_headers())
+        response = await route.fetch(headers=headers)
+        if response.status == 304 and entry is not None:
+            cache.mark_revalidated(request.url)
+            await route.fulfill(status=200, body=entry.body, content_type="text/html; charset=utf-8")
+            return
+        body = await response.body()
+        if response.status == 200:
+            cache.put(request.url, body, response.headers.get("etag"), response.headers.get("last-modified"))
+        await route.fulfill(response=response, body=body)
+
+    await context.route("**/*", handle_route)
@@ -0,0 +1,151 @@
+import csv
+import os
+import time
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from .fetch_control import exclude_from_latency
+from .run_metrics import metrics
+
+# Element that marks each page type as ready to be read. A memberlist is ready once
+# a data cell is there: the header row alone is present before the rows are filled
+# in, and DataTables renders an empty listing as one "no data" cell.
+READY_SELECTORS = {
+    "findamember": "#chapterName option",
+    "memberlist": "#memberListTable tr td",
+    "profile": ".memberContactDetails",
+}
+
+# Milliseconds to wait for the ready element of each page type,
+# overridable with BNI_READY_TIMEOUT_FINDAMEMBER, BNI_READY_TIMEOUT_MEMBERLIST, ...
+READY_TIMEOUTS = {
+    page_type: int(os.environ.get(f"BNI_READY_TIMEOUT_{page_type.upper()}", default))
+    for page_type, default in (("findamember", 15000), ("memberlist", 10000), ("profile", 10000))
+}
+
+
+class WaitLog:
+    """
+    Count, total, longest and timed-out waits per page type. Once `open`ed,
+    every wait is also written to a CSV file as it happens rather than kept
+    in memory until the end of the run.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.path = None
+        self._file = None
+        self._writer = None
+
+    def open(self, path):
+        self.close()
+        self.path = path
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["URL", "PageType", "WaitSeconds", "Ready"])
+
+    def record(self, url, page_type, seconds, ready):
+        totals = self.totals.setdefault(page_type, {"count": 0, "seconds": 0.0, "max": 0.0, "timed_out": 0})
+        totals["count"] += 1
+        totals["seconds"] += seconds
+        totals["max"] = max(totals["max"], seconds)
+        totals["timed_out"] += not ready
+        if self._writer is not None:
+            self._writer.writerow([url, page_type, f"{seconds:.3f}", ready])
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = self._writer = None
+        print(f"Wait times saved to {self.path}")
+
+
+# Shared by every page of one crawl process
+wait_log = WaitLog()
+
+
+async def wait_ready(page, page_type, url=None):
+    """
+    Waits until the ready element of `page_type` is attached to the DOM, or its
+    timeout expires. A timeout is not an error: empty memberlists and sparse
+    profiles simply lack the element. Returns True if the element appeared.
+    """
+    started = time.perf_counter()
+    try:
+        await page.wait_for_selector(READY_SELECTORS[page_type], state="attached",
+                                     timeout=READY_TIMEOUTS[page_type])
+        ready = True
+    except PlaywrightTimeoutError:
+        ready = False
+    seconds = time.perf_counter() - started
+    if not ready:
+        # Waiting out the timeout says nothing about how fast the server is
+        exclude_from_latency(seconds)
+    wait_log.record(url or page.url, page_type, seconds, ready)
+    metrics.observe("dom_wait", seconds)
+    return ready
+
+
+class PageLoadError(Exception):
+    """Raised when the server answers a navigation with 429 or a 5xx status."""
+
+    def __init__(self, url, status):
+        super().__init__(f"HTTP {status} for {url}")
+        self.url = url
+        self.status = status
+
+
+class PageCrashed(Exception):
+    """
+    Raised when the page, its context or the browser died under a navigation.
+    Retrying on the same page cannot succeed, so the fetch controller leaves it
+    to the engine, which re-queues the work on a fresh page.
+    """
+
+    retryable = False
+
+    def __init__(self, url):
+        super().__init__(f"Browser page crashed or closed while loading {url}")
+        self.url = url
+
+
+# Playwright error messages of a crashed or closed page, context or browser
+CRASH_MESSAGES = ("crashed", "has been closed", "Target closed", "Connection closed")
+
+
+def is_crash(page, error):
+    """True when `error` (raised on `page`, or while getting one when `page` is None) means the browser side died."""
+    return (isinstance(error, PageCrashed) or (page is not None and page.is_closed())
+            or any(message in str(error) for message in CRASH_MESSAGES))
+
+
+async def goto_ready(page, url, page_type, timeout=60000):
+    """
+    Navigates to `url` and waits for the page type's ready element. Overload and
+    server errors raise PageLoadError instead of waiting on an error page, so
+    the fetch controller can retry them.
+    """
+    started = time.perf_counter()
+    try:
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+    except Exception as e:
+        if is_crash(page, e):
+            raise PageCrashed(url) from e
+        raise
+    seconds = time.perf_counter() - started
+    metrics.observe("navigation", seconds)
+    length = response.headers.get("content-length", "") if response is not None else ""
+    metrics.record_load(url, page_type, seconds, int(length) if length.isdigit() else 0,
+                        response.status if response is not None else None)
+    if response is not None and (response.status == 429 or response.status >= 500):
+        raise PageLoadError(url, response.status)
+    return await wait_ready(page, page_type, url)
+
+
+def print_wait_summary():
+    for page_type in READY_SELECTORS:
+        totals = wait_log.totals.get(page_type)
+        if totals:
+            print(f"Waited on {totals['count']} {page_type} pages: "
+                  f"total {totals['seconds']:.1f}s, max {totals['max']:.2f}s, {totals['timed_out']} timed out")
@@ -0,0 +1,168 @@
+"""
+Crawls several BNI regions in one run. Targets are read from a JSON list of
+{"name", "base_url", "region_id"} objects (see regions.json); each region is
+crawled like the all mode, through its own browser context (or HTTP engine), into
+<output_dir>/<name>.csv. All regions share one concurrency budget and per-host
+politeness limits.
+
+    python -m bni_scraper regions regions.json --concurrency 16 --per-host 4
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+from .browser import BrowserLauncher, PagePool
+from .crawl_limits import CrawlLimiter
+from .crawler import Crawler
+from .fetch_control import FetchController
+from .member_pool import MEMBER_CSV_HEADER, BrowserEngine
+from .outputs import SingleFileOutput
+from .page_cache import open_page_cache
+from .resource_blocking import site_domain
+from .run_metrics import metrics
+from .strategies import CrossProductStrategy, RegionStrategy
+
+
+def load_targets(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        targets = json.load(f)
+    for target in targets:
+        if not target["base_url"].endswith("/"):
+            target["base_url"] += "/"
+        target["region_id"] = str(target["region_id"])
+        target.setdefault("name", f"region{target['region_id']}")
+    return targets
+
+
+async def crawl_region(target, engine, output_dir, concurrency, strategy_name="region"):
+    """
+    Lists one region (its region-wide memberlist, or with strategy "cross_product"
+    its planned non-empty combinations) and writes every member once to
+    <output_dir>/<name>.csv. Returns the rows written.
+    """
+    name, base_url, region_id = target["name"], target["base_url"], target["region_id"]
+    if strategy_name == "region":
+        strategy = RegionStrategy(base_url, region_id)
+    else:
+        strategy = CrossProductStrategy(os.path.join(output_dir, f"combination_plan_{name}.json"), base_url,
+                                        region_id)
+    dropdown_options = {}
+    if strategy.dropdown_ids:
+        dropdown_options = await engine.dropdown_values(base_url + "findamember", strategy.dropdown_ids)
+        if not all(dropdown_options.get(dropdown_id) for dropdown_id in strategy.dropdown_ids):
+            print(f"[{name}] One or more dropdown values are empty, skipping region.")
+            return 0
+
+    output = SingleFileOutput(os.path.join(output_dir, f"{name}.csv"), MEMBER_CSV_HEADER)
+    try:
+        stats = await Crawler(engine, strategy, output, concurrency, name=name).run(dropdown_options)
+        return stats["written"]
+    finally:
+        output.close()
+        output.report()
+
+
+async def run_targets(targets, options):
+    """
+    Crawls `targets` concurrently in this process under one CrawlLimiter; each
+    region adapts its own request rate through a FetchController.
+    """
+    limiter = CrawlLimiter(options.concurrency, options.per_host, options.host_delay)
+    cache = open_page_cache()
+    try:
+        if options.engine == "http":
+            from .http_engine import HttpEngine, create_session
+            async with create_session(options.concurrency) as session:
+                results = await asyncio.gather(
+                    *(crawl_region(target,
+                                   HttpEngine(session, cache=cache, limiter=limiter, controller=FetchController()),
+                                   options.output_dir, options.per_host, options.strategy) for target in targets),
+                    return_exceptions=True,
+                )
+        else:
+            launcher = BrowserLauncher(cache)
+
+            async def crawl_in_context(target):
+                # Every region gets its own recycled contexts: separate cookies, routes and pages,
+                # with the region's own site allowed to run its scripts
+                pool = PagePool(launcher, allowed_domains={site_domain(target["base_url"])})
+                try:
+                    engine = BrowserEngine(limiter=limiter, controller=FetchController(), pages=pool)
+                    return await crawl_region(target, engine, options.output_dir, options.per_host, options.strategy)
+                finally:
+                    await pool.close()
+                    pool.report()
+
+            try:
+                results = await asyncio.gather(*(crawl_in_context(target) for target in targets),
+                                               return_exceptions=True)
+            finally:
+                await launcher.close()
+    finally:
+        if cache is not None:
+            cache.close()
+
+    for target, result in zip(targets, results):
+        if isinstance(result, BaseException):
+            print(f"[{target['name']}] Region failed: {result}")
+        else:
+            print(f"[{target['name']}] {result} members written")
+    # One report per crawl process
+    report_name = "run_report.json" if options.processes <= 1 else f"run_report_{os.getpid()}.json"
+    metrics.save_report(os.path.join(options.output_dir, report_name))
+    return results
+
+
+def _run_process(targets, options):
+    return asyncio.run(run_targets(targets, options))
+
+
+def split_by_host(targets, processes):
+    """
+    Groups targets into at most `processes` groups so that all regions of one host
+    land in the same process and its per-host limits still hold.
+    """
+    by_host = {}
+    for target in targets:
+        by_host.setdefault(urlparse(target["base_url"]).hostname, []).append(target)
+    groups = [[] for _ in range(min(processes, len(by_host)))]
+    for hosts_targets in sorted(by_host.values(), key=len, reverse=True):
+        min(groups, key=len).extend(hosts_targets)
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl several BNI regions with a shared concurrency budget.")
+    parser.add_argument("targets", nargs="?", default="regions.json",
+                        help="JSON list of {name, base_url, region_id} targets")
+    parser.add_argument("--output-dir", default="regions", help="folder for the per-region outputs")
+    parser.add_argument("--concurrency", type=int, default=16, help="page loads in flight across all regions")
+    parser.add_argument("--per-host", type=int, default=4, help="page loads in flight per host")
+    parser.add_argument("--host-delay", type=float, default=0.0,
+                        help="minimum seconds between page loads started on one host")
+    parser.add_argument("--engine", choices=["browser", "http"], default=os.environ.get("BNI_ENGINE", "browser"))
+    parser.add_argument("--strategy", choices=["region", "cross_product"], default="region",
+                        help="list each region page by page, or its chapter/city/area combinations")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="split regions (grouped by host) across this many processes")
+    options = parser.parse_args()
+
+    targets = load_targets(options.targets)
+    os.makedirs(options.output_dir, exist_ok=True)
+    if options.processes <= 1 or len(targets) <= 1:
+        asyncio.run(run_targets(targets, options))
+        return
+
+    groups = split_by_host(targets, options.processes)
+    # The global budget is divided between the processes
+    options.concurrency = max(1, options.concurrency // len(groups))
+    with ProcessPoolExecutor(max_workers=len(groups)) as executor:
+        for future in [executor.submit(_run_process, group, options) for group in groups]:
+            future.result()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+from urllib.parse import urlparse
+
+# Run Chromium without a window when BNI_HEADLESS=1
+HEADLESS = os.environ.get("BNI_HEADLESS", "0") == "1"
+
+# Requests are only intercepted when BNI_BLOCK_RESOURCES is not 0
+BLOCKING_ENABLED = os.environ.get("BNI_BLOCK_RESOURCES", "1") != "0"
+
+# Resource types never needed to read text and hrefs with page.evaluate.
+# Stylesheets are blocked too; allow them again with
+# BNI_ALLOWED_RESOURCE_TYPES=stylesheet if innerText ever depends on them.
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet", "texttrack", "manifest"}
+
+# Resource types that are blocked when they come from a host outside the allowlist
+# (trackers, analytics, chat widgets, ...). Documents are always let through.
+THIRD_PARTY_BLOCKED_TYPES = {"script", "xhr", "fetch", "eventsource", "websocket", "other"}
+
+# Hosts (and their subdomains) whose scripts and XHRs are allowed,
+# extendable with a comma separated BNI_ALLOWED_DOMAINS
+ALLOWED_DOMAINS = {"bnicentraldubai.ae"} | {
+    domain.strip().lower() for domain in os.environ.get("BNI_ALLOWED_DOMAINS", "").split(",") if domain.strip()
+}
+
+ALLOWED_RESOURCE_TYPES = {
+    kind.strip().lower() for kind in os.environ.get("BNI_ALLOWED_RESOURCE_TYPES", "").split(",") if kind.strip()
+}
+
+
+def site_domain(url):
+    """The host of `url` without a leading www., so the site's subdomains are allowed with it."""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def is_allowed_host(url, allowed_domains=ALLOWED_DOMAINS):
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == domain or host.endswith("." + domain) for domain in allowed_domains)
+
+
+def should_block(resource_type, url, allowed_domains=ALLOWED_DOMAINS, allowed_types=ALLOWED_RESOURCE_TYPES):
+    if resource_type in allowed_types:
+        return False
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    return resource_type in THIRD_PARTY_BLOCKED_TYPES and not is_allowed_host(url, allowed_domains)
+
+
+class BlockingStats:
+    """
+    Counts intercepted requests for one run. Aborted requests are never
+    downloaded, so their size is unknown; the report gives the number blocked
+    per type and the bytes actually transferred (from Content-Length), which can
+    be compared against a run with BNI_BLOCK_RESOURCES=0 to see the bytes saved.
+    """
+
+    def __init__(self):
+        self.blocked = {}
+        self.allowed_requests = 0
+        self.bytes_loaded = 0
+
+    def on_response(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.bytes_loaded += int(length)
+
+    def report(self):
+        blocked_total = sum(self.blocked.values())
+        by_type = ", ".join(f"{kind}: {count}" for kind, count in sorted(self.blocked.items()))
+        print(f"Requests allowed: {self.allowed_requests}, blocked: {blocked_total}"
+              + (f" ({by_type})" if by_type else ""))
+        print(f"Bytes loaded: {self.bytes_loaded / 1024 / 1024:.2f} MB")
+
+
+async def block_unneeded_resources(context, allowed_domains=ALLOWED_DOMAINS, allowed_types=ALLOWED_RESOURCE_TYPES,
+                                   stats=None):
+    """
+    Installs a route on the browser context that aborts images, fonts,
+    stylesheets and third-party scripts. Returns the BlockingStats for the run,
+    `stats` when given so several contexts can share one.
+    """
+    stats = stats if stats is not None else BlockingStats()
+    context.on("response", stats.on_response)
+    if not BLOCKING_ENABLED:
+        return stats
+
+    async def handle_route(route):
+        request = route.request
+        if should_block(request.resource_type, request.url, allowed_domains, allowed_types):
+            stats.blocked[request.resource_type] = stats.blocked.get(request.resource_type, 0) + 1
+            await route.abort()
+        else:
+            stats.allowed_requests += 1
+            await route.continue_()
+
+    await context.route("**/*", handle_route)
+    return stats
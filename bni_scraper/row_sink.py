@@ -0,0 +1,259 @@
+import atexit
+import csv
+import os
+import signal
+import sqlite3
+import time
+
+from .run_metrics import metrics
+
+# Rows kept in memory before they are written out
+DEFAULT_BUFFER_ROWS = int(os.environ.get("BNI_BUFFER_ROWS", 500))
+# Seconds after which buffered rows are written even if the buffer is not full
+DEFAULT_FLUSH_INTERVAL = float(os.environ.get("BNI_FLUSH_INTERVAL", 30))
+
+# Sinks that still have to be flushed when the process exits
+_open_sinks = set()
+
+
+def flush_open_sinks():
+    for sink in list(_open_sinks):
+        try:
+            sink.flush()
+        except Exception as e:
+            print(f"Error flushing {sink.path}: {e}")
+
+
+def _exit_on_signal(signum, frame):
+    # Raising SystemExit unwinds the crawl, so `finally` blocks and atexit run
+    raise SystemExit(128 + signum)
+
+
+_exit_hooks_installed = False
+
+
+def _install_exit_hooks():
+    """Flushes open sinks at exit and on SIGTERM/SIGHUP; done when the first sink opens, not on import."""
+    global _exit_hooks_installed
+    if _exit_hooks_installed:
+        return
+    _exit_hooks_installed = True
+    atexit.register(flush_open_sinks)
+    for signal_name in ("SIGTERM", "SIGHUP"):
+        if hasattr(signal, signal_name) and signal.getsignal(getattr(signal, signal_name)) == signal.SIG_DFL:
+            signal.signal(getattr(signal, signal_name), _exit_on_signal)
+
+
+class RowSink:
+    """
+    Base class of the long-lived outputs: rows are buffered and handed to
+    `_write_batch` once `buffer_rows` rows are buffered or `flush_interval`
+    seconds have passed since the last write. Buffered rows are flushed on close,
+    at interpreter exit and on SIGTERM/SIGHUP (SIGINT already unwinds as
+    KeyboardInterrupt). Each row may carry the member's profile link, which
+    keyed outputs use as their primary key. With `auto_flush` off only an
+    explicit `flush` (or close) writes, e.g. a checkpoint journal's sync, so
+    no row reaches disk before the journal records it.
+    """
+
+    def __init__(self, path, header, buffer_rows=DEFAULT_BUFFER_ROWS,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, auto_flush=True):
+        self.path = path
+        self.auto_flush = auto_flush
+        self.header = list(header) if header else None
+        self.buffer_rows = buffer_rows
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self.writes = 0
+        self.closed = False
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        _install_exit_hooks()
+        _open_sinks.add(self)
+
+    def write(self, row, link=None):
+        self._buffer.append((row, link))
+        if not self.auto_flush:
+            return
+        if len(self._buffer) >= self.buffer_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.closed:
+            return
+        if self._buffer:
+            with metrics.stage("write"):
+                self._write_batch(self._buffer)
+            self.rows_written += len(self._buffer)
+            self._buffer = []
+            self.writes += 1
+        self._last_flush = time.monotonic()
+
+    def _write_batch(self, batch):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self._close()
+        self.closed = True
+        _open_sinks.discard(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+class CsvSink(RowSink):
+    """CSV output on one open file handle. The header is written when the file is empty."""
+
+    def __init__(self, path, header=None, **kwargs):
+        super().__init__(path, header, **kwargs)
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        if header and self._file.tell() == 0:
+            self._writer.writerow(header)
+            self._file.flush()
+
+    def _write_batch(self, batch):
+        self._writer.writerows(row for row, _ in batch)
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetSink(RowSink):
+    """
+    Parquet output written as one Arrow record batch per flush, with every column
+    as a string plus a ProfileLink column. Parquet files cannot be appended to, so
+    a resumed run writes a new part file next to the existing one.
+    """
+
+    def __init__(self, path, header, **kwargs):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+        stem, extension = os.path.splitext(path)
+        part = 1
+        while os.path.exists(path):
+            part += 1
+            path = f"{stem}.part{part}{extension}"
+        super().__init__(path, header, **kwargs)
+        self._pyarrow = pyarrow
+        self.columns = self.header + ["ProfileLink"]
+        self.schema = pyarrow.schema([(name, pyarrow.string()) for name in self.columns])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression="zstd")
+
+    def _write_batch(self, batch):
+        width = len(self.header)
+        columns = [[] for _ in self.columns]
+        for row, link in batch:
+            cells = list(row[:width]) + [""] * (width - len(row))
+            for index, value in enumerate(cells):
+                columns[index].append("" if value is None else str(value))
+            columns[width].append(link)
+        arrays = [self._pyarrow.array(values, type=self._pyarrow.string()) for values in columns]
+        self._writer.write_batch(self._pyarrow.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def _close(self):
+        self._writer.close()
+
+
+class SqliteSink(RowSink):
+    """
+    SQLite output: one table keyed on ProfileLink, so a member can be looked up or
+    joined without scanning a CSV. Re-scraped members replace their previous row.
+    Rows without a profile link are keyed on their member cells instead.
+    """
+
+    def __init__(self, path, header, table="members", **kwargs):
+        super().__init__(path, header, **kwargs)
+        self.table = table
+        self.columns = ["ProfileLink"] + self.header
+        self.connection = sqlite3.connect(path)
+        column_sql = ", ".join(f'"{name}" TEXT' for name in self.header)
+        self.connection.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}" ("ProfileLink" TEXT PRIMARY KEY, {column_sql})'
+        )
+        for name in ("MemberName", "Company"):
+            if name in self.header:
+                self.connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{table}_{name}" ON "{table}" ("{name}")'
+                )
+        self.connection.commit()
+        placeholders = ", ".join("?" for _ in self.columns)
+        quoted = ", ".join(f'"{name}"' for name in self.columns)
+        self._insert_sql = f'INSERT OR REPLACE INTO "{table}" ({quoted}) VALUES ({placeholders})'
+
+    def _write_batch(self, batch):
+        width = len(self.header)
+        values = []
+        for row, link in batch:
+            cells = ["" if value is None else str(value) for value in row[:width]]
+            cells += [""] * (width - len(cells))
+            values.append([link or "|".join(cells)] + cells)
+        self.connection.executemany(self._insert_sql, values)
+        self.connection.commit()
+
+    def _close(self):
+        self.connection.close()
+
+
+class MultiSink:
+    """Fans every row out to several sinks."""
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+
+    def write(self, row, link=None):
+        for sink in self.sinks:
+            sink.write(row, link)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def report(self):
+        for sink in self.sinks:
+            print(f"Wrote {sink.rows_written} rows to {sink.path} in {sink.writes} writes")
+
+
+SINK_TYPES = {
+    ".csv": CsvSink,
+    ".parquet": ParquetSink,
+    ".sqlite": SqliteSink,
+}
+
+# Comma separated output formats, e.g. BNI_OUTPUT_FORMATS=csv,parquet,sqlite
+OUTPUT_FORMATS = [
+    name.strip().lower() for name in os.environ.get("BNI_OUTPUT_FORMATS", "csv").split(",") if name.strip()
+]
+
+
+def open_output_sinks(csv_path, header, formats=None, **kwargs):
+    """
+    Opens one sink per output format, all named after `csv_path`
+    (website3.csv, website3.parquet, website3.sqlite). Returns a MultiSink.
+    """
+    stem = os.path.splitext(csv_path)[0]
+    sinks = []
+    for name in formats or OUTPUT_FORMATS:
+        extension = "." + name
+        if extension not in SINK_TYPES:
+            raise ValueError(f"Unknown output format: {name}")
+        path = csv_path if extension == ".csv" else stem + extension
+        sinks.append(SINK_TYPES[extension](path, header, **kwargs))
+    return MultiSink(sinks)
@@ -0,0 +1,192 @@
+import bisect
+import heapq
+import html
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+HISTOGRAM_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+# Where the run report is written; BNI_METRICS_PROM adds a Prometheus text file
+REPORT_PATH = os.environ.get("BNI_REPORT", "run_report.json")
+PROMETHEUS_PATH = os.environ.get("BNI_METRICS_PROM", "")
+
+# Slowest page loads listed in the report
+SLOWEST_LOADS = 25
+
+# Stages whose time is spent waiting for a rate limit or concurrency slot rather than working
+IDLE_STAGES = {"rate_wait", "slot_wait"}
+
+
+class Histogram:
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + [self.max], self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 3),
+            "mean_seconds": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "max_seconds": round(self.max, 3),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets + ["+Inf"], self.counts)},
+        }
+
+
+class RunMetrics:
+    """
+    Timings of every crawl stage (navigation, dom_wait, evaluate, parse,
+    row_assembly, write, and the rate_wait/slot_wait idle time) as histograms,
+    the SLOWEST_LOADS slowest page loads and plain counters such as bytes and
+    retries. Memory stays flat however many pages a run loads.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.page_types = {}
+        # Min-heap of (seconds, order, load) holding only the slowest loads
+        self.slowest_loads = []
+        self._loads = 0
+        self.counters = {}
+
+    def observe(self, stage, seconds):
+        self.stages.setdefault(stage, Histogram()).observe(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """Times the body as one `name` observation; works around awaits too."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_load(self, url, page_type, seconds, size=0, status=None):
+        """One page load: feeds the per page type latency histogram and the slowest loads."""
+        self.page_types.setdefault(page_type, Histogram()).observe(seconds)
+        self._loads += 1
+        load = (round(seconds, 3), self._loads, (url, page_type, round(seconds, 3), size, status))
+        if len(self.slowest_loads) < SLOWEST_LOADS:
+            heapq.heappush(self.slowest_loads, load)
+        else:
+            heapq.heappushpop(self.slowest_loads, load)
+        self.count("bytes", size)
+        self.count("pages")
+
+    def as_dict(self):
+        elapsed = time.time() - self.started
+        idle = sum(self.stages[stage].total for stage in IDLE_STAGES if stage in self.stages)
+        return {
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "elapsed_seconds": round(elapsed, 1),
+            "idle_seconds": round(idle, 1),
+            "counters": self.counters,
+            "stages": {stage: histogram.as_dict() for stage, histogram in sorted(self.stages.items())},
+            "page_types": {page_type: histogram.as_dict() for page_type, histogram in sorted(self.page_types.items())},
+            "slowest_urls": [
+                {"url": url, "page_type": page_type, "seconds": seconds, "bytes": size, "status": status}
+                for _, _, (url, page_type, seconds, size, status) in sorted(self.slowest_loads, reverse=True)
+            ],
+        }
+
+    def print_summary(self):
+        for stage, histogram in sorted(self.stages.items(), key=lambda item: -item[1].total):
+            print(f"{stage}: {histogram.count} x, total {histogram.total:.1f}s, "
+                  f"p50 {histogram.quantile(0.5):.2f}s, p95 {histogram.quantile(0.95):.2f}s")
+        if self.counters:
+            print(", ".join(f"{name}: {value}" for name, value in sorted(self.counters.items())))
+
+    def save_report(self, path=REPORT_PATH, prometheus_path=PROMETHEUS_PATH):
+        """Writes the JSON report, an HTML rendering next to it and optionally Prometheus metrics."""
+        report = self.as_dict()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+        html_path = os.path.splitext(path)[0] + ".html"
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(render_html(report))
+        print(f"Run report saved to {path} and {html_path}")
+        if prometheus_path:
+            with open(prometheus_path, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            print(f"Metrics saved to {prometheus_path}")
+
+    def prometheus_text(self):
+        lines = []
+
+        def histogram_lines(name, label, histograms):
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in sorted(histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label}="{key}"}} {histogram.total:.6f}')
+                lines.append(f'{name}_count{{{label}="{key}"}} {histogram.count}')
+
+        histogram_lines("bni_stage_seconds", "stage", self.stages)
+        histogram_lines("bni_page_load_seconds", "page_type", self.page_types)
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE bni_{name}_total counter")
+            lines.append(f"bni_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+def render_html(report):
+    def table(title, rows, columns):
+        head = "".join(f"<th>{html.escape(column)}</th>" for column in columns)
+        body = "".join("<tr>" + "".join(f"<td>{html.escape(str(value))}</td>" for value in row) + "</tr>"
+                       for row in rows)
+        return f"<h2>{html.escape(title)}</h2><table><tr>{head}</tr>{body}</table>"
+
+    histogram_columns = ["", "count", "total s", "mean s", "p50 s", "p95 s", "max s"]
+
+    def histogram_rows(histograms):
+        return [[key, h["count"], h["total_seconds"], h["mean_seconds"], h["p50_seconds"], h["p95_seconds"],
+                 h["max_seconds"]] for key, h in histograms.items()]
+
+    return (
+        "<html><head><meta charset='utf-8'><title>Crawl run report</title>"
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:1em}"
+        "td,th{border:1px solid #ccc;padding:2px 8px;text-align:right}td:first-child{text-align:left}</style>"
+        "</head><body>"
+        f"<h1>Crawl run report</h1><p>Started {html.escape(report['started'])}, "
+        f"{report['elapsed_seconds']}s elapsed, {report['idle_seconds']}s waiting on limits.</p>"
+        + table("Stages", histogram_rows(report["stages"]), histogram_columns)
+        + table("Page loads", histogram_rows(report["page_types"]), histogram_columns)
+        + table("Counters", sorted(report["counters"].items()), ["counter", "value"])
+        + table("Slowest URLs", [[load["url"], load["page_type"], load["seconds"], load["bytes"], load["status"]]
+                                 for load in report["slowest_urls"]], ["url", "type", "s", "bytes", "status"])
+        + "</body></html>"
+    )
+
+
+# Shared by every module of one crawl process
+metrics = RunMetrics()
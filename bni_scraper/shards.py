@@ -0,0 +1,151 @@
+"""
+Splits the crawl work list across K worker processes, each with its own
+Chromium (or HTTP session), and merges the per-shard outputs into one CSV.
+
+The work list comes from dropdown_values.json: the saved combination plan
+(combination_plan.json) when there is one, otherwise the full chapterName x
+chapterCity x chapterArea cross product; with --chapters only the chapter IDs.
+
+    python -m bni_scraper shards --shards 4
+    python -m bni_scraper shards --merge-only shards_1700000000
+"""
+import argparse
+import asyncio
+import csv
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .browser import open_engine
+from .crawl_limits import CrawlLimiter
+from .crawl_plan import load_combination_plan, plan_file_path
+from .crawler import Crawler
+from .dedup_index import DedupIndex, member_key
+from .discovery import DropdownCache
+from .fetch_control import FetchController
+from .member_pool import MEMBER_CSV_HEADER
+from .outputs import SingleFileOutput
+from .page_cache import open_page_cache
+from .row_sink import CsvSink
+from .run_metrics import metrics
+from .strategies import CrossProductStrategy, FixedWorkList
+
+json_file_path = 'dropdown_values.json'
+SHARD_HEADER = MEMBER_CSV_HEADER + ["ProfileLink"]
+
+
+def build_work_list(dropdown_values, chapters_only=False):
+    chapter_names = [name for name in dropdown_values.get("chapterName", []) if name]
+    if chapters_only:
+        return [[name, "", ""] for name in chapter_names]
+    combinations = load_combination_plan(plan_file_path(json_file_path), dropdown_values)
+    if combinations is not None:
+        return combinations
+    chapter_cities = [city for city in dropdown_values.get("chapterCity", []) if city]
+    chapter_areas = [area for area in dropdown_values.get("chapterArea", []) if area]
+    return [[name, city, area] for name in chapter_names for city in chapter_cities for area in chapter_areas]
+
+
+def split_work(work_list, shards):
+    """
+    Deals the work list out so that all combinations of one chapter land in the
+    same shard (members of a chapter mostly repeat across its combinations).
+    """
+    by_chapter = {}
+    for item in work_list:
+        by_chapter.setdefault(item[0], []).append(item)
+    groups = [[] for _ in range(min(shards, len(by_chapter)) or 1)]
+    for items in sorted(by_chapter.values(), key=len, reverse=True):
+        min(groups, key=len).extend(items)
+    return groups
+
+
+async def crawl_shard(shard_index, work_items, output_dir, concurrency, engine_name):
+    """Crawls one shard into <output_dir>/shard<N>.csv, with the profile link as last column."""
+    shard_path = os.path.join(output_dir, f"shard{shard_index}.csv")
+    output = SingleFileOutput(shard_path, MEMBER_CSV_HEADER, formats=["csv"], with_link=True)
+    limiter = CrawlLimiter(concurrency, concurrency)
+    controller = FetchController()
+    cache = open_page_cache()
+    name = f"shard{shard_index}"
+    try:
+        async with open_engine(engine_name, concurrency, cache, limiter, controller) as engine:
+            stats = await Crawler(engine, FixedWorkList(work_items), output, concurrency, name=name).run({})
+    finally:
+        output.close()
+        if cache is not None:
+            cache.close()
+    controller.report()
+    metrics.save_report(os.path.join(output_dir, f"shard{shard_index}.report.json"))
+    print(f"[{name}] {len(work_items)} work items, {stats['written']} members written to {shard_path}")
+    return shard_path
+
+
+def _run_shard(shard_index, work_items, output_dir, concurrency, engine_name):
+    return asyncio.run(crawl_shard(shard_index, work_items, output_dir, concurrency, engine_name))
+
+
+def merge_shards(shard_paths, merged_path):
+    """
+    Streams the shard CSVs in shard order into one CSV with the all.py header,
+    keeping the first row of every member (by profile link, else name + company).
+    """
+    member_index = DedupIndex()
+    merged = 0
+    duplicates = 0
+    with CsvSink(merged_path, header=MEMBER_CSV_HEADER) as output_sink:
+        for shard_path in shard_paths:
+            with open(shard_path, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                width = len(MEMBER_CSV_HEADER)
+                for row in reader:
+                    data = row[:width]
+                    link = row[width] if len(row) > width else None
+                    if not member_index.add(member_key(link, data)):
+                        duplicates += 1
+                        continue
+                    output_sink.write(data)
+                    merged += 1
+    print(f"Merged {merged} members from {len(shard_paths)} shards into {merged_path} "
+          f"({duplicates} duplicates dropped)")
+    return merged_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl in K worker processes and merge the shard outputs.")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 2, help="number of worker processes")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("BNI_CONCURRENCY", 4)),
+                        help="profile pages in flight per shard")
+    parser.add_argument("--chapters", action="store_true",
+                        help="shard chapter IDs (chapter-only listings) instead of combinations")
+    parser.add_argument("--engine", choices=["browser", "http"], default=os.environ.get("BNI_ENGINE", "browser"))
+    parser.add_argument("--output", help="merged CSV path (default: <shard folder>.csv)")
+    parser.add_argument("--merge-only", metavar="SHARD_DIR", help="only merge the shard CSVs of an earlier run")
+    options = parser.parse_args()
+
+    if options.merge_only:
+        output_dir = options.merge_only
+        shard_paths = sorted(glob.glob(os.path.join(output_dir, "shard*.csv")),
+                             key=lambda path: int(os.path.basename(path)[5:-4]))
+    else:
+        dropdown_cache = DropdownCache(json_file_path)
+        if not dropdown_cache.load():
+            parser.error(f"{json_file_path} not found, run a crawl first to discover the dropdown values")
+        dropdown_values = {dropdown_id: [option["value"] for option in dropdown_cache.options.get(dropdown_id, [])]
+                           for dropdown_id in CrossProductStrategy.dropdown_ids}
+        groups = split_work(build_work_list(dropdown_values, options.chapters), options.shards)
+        output_dir = f"shards_{int(time.time())}"
+        os.makedirs(output_dir)
+        print(f"Crawling {sum(len(group) for group in groups)} work items in {len(groups)} shards into {output_dir}")
+        with ProcessPoolExecutor(max_workers=len(groups)) as executor:
+            futures = [executor.submit(_run_shard, index, group, output_dir, options.concurrency, options.engine)
+                       for index, group in enumerate(groups, start=1)]
+            shard_paths = [future.result() for future in futures]
+
+    merge_shards(shard_paths, options.output or f"{output_dir.rstrip(os.sep)}.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+from collections import namedtuple
+
+from .crawl_plan import BASE_URL, REGION_ID, get_combination_plan, memberlist_url
+
+# One memberlist query of a crawl; `label` names it in logs and per-chapter outputs
+WorkItem = namedtuple("WorkItem", ["chapter_name", "chapter_city", "chapter_area", "label"])
+
+
+def _values(options):
+    return [option["value"] for option in options if option["value"]]
+
+
+class WorkListStrategy:
+    """
+    Base class of the work-list plug-ins: `work_items` turns the findamember
+    dropdown options ({dropdown_id: [{"value", "text"}]}) into WorkItems and
+    `url` gives the memberlist URL of one item on the strategy's site.
+    """
+
+    name = None
+    dropdown_ids = []
+
+    def __init__(self, base_url=BASE_URL, region_id=REGION_ID):
+        self.base_url = base_url
+        self.region_id = region_id
+
+    async def work_items(self, engine, dropdown_options):
+        raise NotImplementedError
+
+    def url(self, item):
+        return memberlist_url(item.chapter_name, item.chapter_city, item.chapter_area, self.base_url, self.region_id)
+
+
+class RegionStrategy(WorkListStrategy):
+    """
+    One memberlist of the whole region (no chapter, city or area filter), read
+    page by page by the engine. Needs no dropdown values, and replaces the
+    hundreds of listings of the cross product with the region's few pages.
+    """
+
+    name = "region"
+
+    async def work_items(self, engine, dropdown_options):
+        return [WorkItem("", "", "", f"region {self.region_id}")]
+
+
+class CrossProductStrategy(WorkListStrategy):
+    """
+    chapterName x chapterCity x chapterArea combinations. With `plan_path` only
+    the combinations of the saved (or newly probed) combination plan are crawled;
+    without it every combination is.
+    """
+
+    name = "cross_product"
+    dropdown_ids = ["chapterName", "chapterCity", "chapterArea"]
+
+    def __init__(self, plan_path=None, base_url=BASE_URL, region_id=REGION_ID):
+        super().__init__(base_url, region_id)
+        self.plan_path = plan_path
+
+    async def work_items(self, engine, dropdown_options):
+        dropdown_values = {dropdown_id: _values(dropdown_options.get(dropdown_id, []))
+                           for dropdown_id in self.dropdown_ids}
+        if not all(dropdown_values.values()):
+            print("One or more dropdown values are empty, skipping iteration.")
+            return []
+        if self.plan_path is not None:
+            # Only the combinations that can return members are crawled
+            combinations = await get_combination_plan(engine, dropdown_values, self.plan_path,
+                                                       self.base_url, self.region_id)
+        else:
+            combinations = [[name, city, area] for name in dropdown_values["chapterName"]
+                            for city in dropdown_values["chapterCity"] for area in dropdown_values["chapterArea"]]
+        return [WorkItem(name, city, area, f"{name}/{city}/{area}") for name, city, area in combinations]
+
+
+class ChapterStrategy(WorkListStrategy):
+    """One chapter-only memberlist per chapterName, labelled with the chapter's text."""
+
+    name = "chapter"
+    dropdown_ids = ["chapterName"]
+
+    async def work_items(self, engine, dropdown_options):
+        chapters = [option for option in dropdown_options.get("chapterName", []) if option["value"]]
+        if not chapters:
+            print("No chapter names found, skipping iteration.")
+        return [WorkItem(option["value"], "", "", option.get("text") or option["value"]) for option in chapters]
+
+
+class FixedWorkList(WorkListStrategy):
+    """A work list decided beforehand, such as one shard of a sharded crawl."""
+
+    name = "fixed"
+
+    def __init__(self, combinations, base_url=BASE_URL, region_id=REGION_ID):
+        super().__init__(base_url, region_id)
+        self.combinations = combinations
+
+    async def work_items(self, engine, dropdown_options):
+        return [WorkItem(name, city, area, f"{name}/{city}/{area}") for name, city, area in self.combinations]
+
+
+STRATEGIES = {
+    RegionStrategy.name: RegionStrategy,
+    CrossProductStrategy.name: CrossProductStrategy,
+    ChapterStrategy.name: ChapterStrategy,
+    FixedWorkList.name: FixedWorkList,
+}
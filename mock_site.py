@@ -0,0 +1,224 @@
+"""
+Local stand-in for bnicentraldubai.ae. It serves synthetic findamember,
+memberlist and member profile pages with the DOM the scrapers read
+(#chapterName options, #memberListTable, .memberContactDetails, ...), so
+crawls can be measured without touching the real site.
+
+    python mock_site.py --members 500 --latency 0.05 --error-rate 0.02
+
+Point a crawl at it with BNI_BASE_URL=http://127.0.0.1:8765/en-AE/.
+"""
+import argparse
+import random
+import struct
+import threading
+import time
+import zlib
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+CHAPTERS = [
+    ("15090", "BNI Champions"), ("10410", "BNI Gazelles"), ("37851", "BNI Gratitude"),
+    ("1147", "BNI Insomniacs"), ("39829", "BNI Polaris"), ("1145", "BNI Rising Phoenix"),
+    ("38832", "BNI Spectacular"), ("38554", "BNI Success"), ("35472", "BNI Victory"),
+    ("27711", "BNI Warriors"),
+]
+CITIES = ["Ajman", "Al Quoz", "Bur Dubai", "Business Bay", "Deira", "Dubai", "Dubai Silicon Oasis", "Sharjah"]
+AREAS = ["2673", "3778"]
+PROFESSIONS = ["Accounting", "Architecture", "Catering", "Insurance", "IT Services", "Legal", "Marketing", "Printing"]
+# Company logos are shared between members, as on the real site
+LOGO_COUNT = 25
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+# 1x1 transparent PNG, served for every photo and logo
+PIXEL_PNG = (b"\x89PNG\r\n\x1a\n"
+             + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 6, 0, 0, 0))
+             + _png_chunk(b"IDAT", zlib.compress(b"\x00\x00\x00\x00\x00"))
+             + _png_chunk(b"IEND", b""))
+
+
+class MockSite:
+    """
+    Deterministic synthetic membership plus the latency and error behaviour
+    of the server, and counters of what was served.
+    """
+
+    def __init__(self, members=200, latency=0.0, error_rate=0.0, seed=1, page_size=100):
+        self.latency = latency
+        # Rows per memberlist page; longer listings link to their next page
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        generator = random.Random(seed)
+        self.members = [
+            {
+                "id": index,
+                "name": f"Member {index:05d}",
+                "chapter": CHAPTERS[index % len(CHAPTERS)],
+                "city": generator.choice(CITIES),
+                "area": generator.choice(AREAS),
+                "profession": generator.choice(PROFESSIONS),
+                "company": f"Company {index // 3:04d} LLC",
+                "phones": [f"+971 5{generator.randrange(10**7, 10**8)}" for _ in range(generator.randrange(1, 4))],
+                "social": [f"https://www.linkedin.com/in/member{index}"] * generator.randrange(0, 2),
+            }
+            for index in range(members)
+        ]
+        self.lock = threading.Lock()
+        self.served = {}
+        self.errors = 0
+        self.bytes_sent = 0
+
+    def count(self, page_type, size):
+        with self.lock:
+            self.served[page_type] = self.served.get(page_type, 0) + 1
+            self.bytes_sent += size
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.latency * self.random.uniform(0.5, 1.5))
+
+    def should_fail(self):
+        with self.lock:
+            failed = self.error_rate and self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return failed
+
+    def findamember_html(self):
+        def options(dropdown_id, values):
+            items = "".join(f'<option value="{escape(value)}">{escape(text)}</option>' for value, text in values)
+            return f'<select id="{dropdown_id}"><option value="">Select</option>{items}</select>'
+
+        return ("<html><body><form>"
+                + options("chapterName", CHAPTERS)
+                + options("chapterCity", [(city, city) for city in CITIES])
+                + options("chapterArea", [(area, f"Area {area}") for area in AREAS])
+                + "</form></body></html>")
+
+    def memberlist_html(self, query):
+        chapter = query.get("chapterName", [""])[0]
+        city = query.get("chapterCity", [""])[0]
+        area = query.get("chapterArea", [""])[0]
+        rows = []
+        for member in self.members:
+            if ((chapter and member["chapter"][0] != chapter) or (city and member["city"] != city)
+                    or (area and member["area"] != area)):
+                continue
+            link = f"/en-AE/memberdetails?encryptedMemberId={member['id']}"
+            cells = [f'<a href="{link}">{escape(member["name"])}</a>', escape(member["chapter"][1]),
+                     escape(member["city"]), "Street", escape(member["profession"]), escape(member["company"])]
+            rows.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+        if not rows:
+            return "<html><body><p>No members found.</p></body></html>"
+        pager = ""
+        if self.page_size:
+            page = max(1, int(query.get("page", ["1"])[0] or 1))
+            if page * self.page_size < len(rows):
+                next_query = urlencode({**{key: values[0] for key, values in query.items()}, "page": page + 1})
+                pager = (f'<ul class="pagination"><li class="next">'
+                         f'<a rel="next" href="memberlist?{escape(next_query)}">Next</a></li></ul>')
+            rows = rows[(page - 1) * self.page_size:page * self.page_size]
+        header = "".join(f"<th>{title}</th>" for title in ("Name", "Chapter", "City", "Street", "Profession", "Company"))
+        return (f'<html><body><table id="memberListTable"><tr>{header}</tr>{"".join(rows)}</table>'
+                f"{pager}</body></html>")
+
+    def profile_html(self, member_id):
+        member = self.members[member_id]
+        phones = "".join(f'<li><a href="tel:{phone}">{phone}</a></li>' for phone in member["phones"])
+        social = "".join(f'<a href="{url}">in</a>' for url in member["social"])
+        return (
+            "<html><body>"
+            f'<div class="profilephoto"><a href="/media/photo{member_id}.png"><img src="/media/photo{member_id}.png"></a></div>'
+            f'<div class="memberProfileInfo"><h2>{escape(member["name"])}</h2>'
+            f'<p><a href="https://company{member_id // 3}.example.com">Website</a></p></div>'
+            f'<div class="memberContactDetails"><ul>{phones}</ul><div class="smUrls">{social}</div></div>'
+            f'<div class="widgetMemberCompanyDetail"><h6>{escape(member["company"])}<br>Street<br>'
+            f'{escape(member["city"])}</h6></div>'
+            f'<div class="companyLogo"><img src="/media/logo{member_id // 3 % LOGO_COUNT}.png"></div>'
+            "</body></html>"
+        )
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    site = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", page_type=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if page_type is not None:
+            self.site.count(page_type, len(body))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.startswith("/media/"):
+            self._send(200, PIXEL_PNG, "image/png", "asset")
+            return
+
+        self.site.delay()
+        if self.site.should_fail():
+            self._send(503, b"Service Unavailable", "text/plain")
+            return
+        if url.path == "/en-AE/findamember":
+            self._send(200, self.site.findamember_html().encode(), page_type="findamember")
+        elif url.path == "/en-AE/memberlist":
+            self._send(200, self.site.memberlist_html(query).encode(), page_type="memberlist")
+        elif url.path == "/en-AE/memberdetails":
+            try:
+                member_id = int(query.get("encryptedMemberId", [""])[0])
+                html = self.site.profile_html(member_id)
+            except (ValueError, IndexError):
+                self._send(404, b"Not Found", "text/plain")
+                return
+            self._send(200, html.encode(), page_type="profile")
+        else:
+            self._send(404, b"Not Found", "text/plain")
+
+
+def start_mock_site(site, host="127.0.0.1", port=0):
+    """Serves `site` from a background thread; returns the server (port 0 picks a free port)."""
+    handler = type("BoundMockRequestHandler", (MockRequestHandler,), {"site": site})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/en-AE/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic BNI members site on localhost.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="average seconds added to each page")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of pages answered with 503")
+    parser.add_argument("--page-size", type=int, default=100, help="memberlist rows per page, 0 for one page")
+    options = parser.parse_args()
+
+    site = MockSite(options.members, options.latency, options.error_rate, page_size=options.page_size)
+    server = start_mock_site(site, port=options.port)
+    print(f"Serving {options.members} members at {base_url(server)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
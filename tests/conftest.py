@@ -0,0 +1,62 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+# mock_site.py lives next to the package
+sys.path.insert(0, ROOT)
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves the saved pages under the site's URLs: findamember, memberlist pages and profiles."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/en-AE/findamember":
+            name = "findamember.html"
+        elif url.path == "/en-AE/memberlist":
+            if "scripted" in query:
+                name = "memberlist_scripted.html"
+            elif "empty" in query:
+                name = "memberlist_empty.html"
+            else:
+                name = f"memberlist_page{query.get('page', ['1'])[0]}.html"
+        elif url.path == "/en-AE/memberdetails":
+            name = "profile_sparse.html" if query.get("encryptedMemberId") == ["def"] else "profile.html"
+        else:
+            name = None
+        if name is None or not os.path.exists(os.path.join(FIXTURES, name)):
+            self.send_error(404)
+            return
+        body = read_fixture(name).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def fixture_site():
+    """Base URL of a local server answering with the saved fixture pages."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}/en-AE/"
+    server.shutdown()
+    server.server_close()
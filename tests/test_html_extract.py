@@ -0,0 +1,85 @@
+from bni_scraper.html_extract import (is_scripted_listing, next_page_url, parse_dropdown_options,
+                                      parse_member_details, parse_member_list)
+from bni_scraper.member_pool import DETAIL_CSV_HEADER
+
+from conftest import read_fixture
+
+LIST_URL = "https://bnicentraldubai.ae/en-AE/memberlist?chapterName=15090"
+PROFILE_URL = "https://bnicentraldubai.ae/en-AE/memberdetails?encryptedMemberId=abc"
+
+
+def test_parse_member_list_reads_cells_and_absolute_links():
+    rows = parse_member_list(read_fixture("memberlist_page1.html"), LIST_URL)
+    assert rows == [
+        {"data": ["Aisha Rahman", "BNI Champions", "Business Bay", "Bay Square", "Accounting", "Rahman & Co"],
+         "link": "https://bnicentraldubai.ae/en-AE/memberdetails?encryptedMemberId=abc%3D%3D"},
+        {"data": ["Omar Khalid", "BNI Gazelles", "Deira", "", "Legal", "Khalid Legal"],
+         "link": "https://bnicentraldubai.ae/en-AE/memberdetails?encryptedMemberId=def"},
+    ]
+
+
+def test_parse_member_list_without_tbody():
+    rows = parse_member_list(read_fixture("memberlist_page2.html"), LIST_URL)
+    assert [row["data"][0] for row in rows] == ["Sara Lopez"]
+    assert rows[0]["link"] == "https://bnicentraldubai.ae/en-AE/memberdetails?encryptedMemberId=ghi"
+
+
+def test_parse_member_list_returns_none_without_table():
+    assert parse_member_list(read_fixture("memberlist_scripted.html"), LIST_URL) is None
+
+
+def test_is_scripted_listing_tells_scripted_from_empty():
+    assert is_scripted_listing(read_fixture("memberlist_scripted.html"))
+    assert not is_scripted_listing(read_fixture("memberlist_empty.html"))
+
+
+def test_next_page_url_follows_pager():
+    assert next_page_url(read_fixture("memberlist_page1.html"), LIST_URL) == \
+        "https://bnicentraldubai.ae/en-AE/memberlist?chapterName=15090&page=2"
+
+
+def test_next_page_url_stops_on_disabled_link():
+    assert next_page_url(read_fixture("memberlist_page2.html"), LIST_URL) is None
+    assert next_page_url(read_fixture("memberlist_scripted.html"), LIST_URL) is None
+
+
+def test_parse_member_details():
+    details = parse_member_details(read_fixture("profile.html"), PROFILE_URL)
+    assert len(details) == len(DETAIL_CSV_HEADER)
+    assert dict(zip(DETAIL_CSV_HEADER, details)) == {
+        "Phone1": "+971 50 123 4567",
+        "Phone2": "+971 4 123 4567",
+        "Phone3": "",
+        "SocialMedia1": "https://www.linkedin.com/in/aisha",
+        "SocialMedia2": "https://bnicentraldubai.ae/redirect?to=facebook",
+        "SocialMedia3": "",
+        "ProfilePhotoLink": "https://bnicentraldubai.ae/media/photos/aisha.jpg",
+        # innerHTML, as the browser extractor reads it
+        "Address": "Rahman &amp; Co, Office 1203, Bay Square, Business Bay, Dubai",
+        "CompanyWebsite": "https://rahman-co.example.com",
+        "CompanyLogo": "https://bnicentraldubai.ae/media/logos/rahman.png",
+    }
+
+
+def test_parse_member_details_pads_sparse_profile():
+    details = parse_member_details(read_fixture("profile_sparse.html"), PROFILE_URL)
+    assert details == ["+971 55 987 6543", "", "", "", "", "", "", " ", " ", " "]
+
+
+def test_parse_dropdown_options():
+    html = read_fixture("findamember.html")
+    assert parse_dropdown_options(html, "chapterName") == [
+        {"value": "15090", "text": "BNI Champions"},
+        {"value": "10410", "text": "BNI Gazelles"},
+        {"value": "37851", "text": "BNI Gratitude"},
+    ]
+    assert parse_dropdown_options(html, "chapterCity") == [
+        {"value": "Abu Dubai", "text": "Abu Dubai"},
+        {"value": "Business Bay", "text": "Business Bay"},
+    ]
+    # An option without a value attribute submits its text
+    assert parse_dropdown_options(html, "chapterArea") == [
+        {"value": "2673", "text": "Dubai North"},
+        {"value": "3778", "text": "3778"},
+    ]
+    assert parse_dropdown_options(html, "missing") == []
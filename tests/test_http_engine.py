@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from bni_scraper.http_engine import HttpEngine, create_session
+from mock_site import MockSite, base_url, start_mock_site
+
+
+def run_engine(operation, fallback=None):
+    """Runs `operation(engine)` on an HttpEngine without cache, limiter or controller."""
+
+    async def main():
+        async with create_session(4) as session:
+            return await operation(HttpEngine(session, fallback=fallback))
+
+    return asyncio.run(main())
+
+
+def test_listing_follows_fixture_pages(fixture_site):
+    rows = run_engine(lambda engine: engine.listing_rows(fixture_site + "memberlist?chapterName=15090"))
+    assert [row["data"][0] for row in rows] == ["Aisha Rahman", "Omar Khalid", "Sara Lopez"]
+    assert rows[1]["link"] == fixture_site + "memberdetails?encryptedMemberId=def"
+
+
+def test_profile_details_from_fixture(fixture_site):
+    details = run_engine(lambda engine: engine.profile_details(fixture_site + "memberdetails?encryptedMemberId=abc"))
+    assert details[0] == "+971 50 123 4567"
+    assert details[-1] == fixture_site.replace("/en-AE/", "/media/logos/rahman.png")
+
+
+def test_dropdown_values_from_fixture(fixture_site):
+    options = run_engine(lambda engine: engine.dropdown_values(fixture_site + "findamember",
+                                                               ["chapterName", "chapterCity"]))
+    assert [option["value"] for option in options["chapterName"]] == ["15090", "10410", "37851"]
+    assert [option["value"] for option in options["chapterCity"]] == ["Abu Dubai", "Business Bay"]
+
+
+def test_scripted_listing_uses_fallback(fixture_site):
+    class BrowserStandIn:
+        async def listing_rows(self, url):
+            return [{"data": ["Rendered"], "link": None, "url": url}]
+
+    async def fallback():
+        return BrowserStandIn()
+
+    url = fixture_site + "memberlist?scripted=1"
+    rows = run_engine(lambda engine: engine.listing_rows(url), fallback)
+    assert rows == [{"data": ["Rendered"], "link": None, "url": url}]
+
+
+def test_empty_listing_skips_fallback(fixture_site):
+    async def fallback():
+        raise AssertionError("an empty listing must not start the browser")
+
+    rows = run_engine(lambda engine: engine.listing_rows(fixture_site + "memberlist?empty=1"), fallback)
+    assert rows == []
+
+
+def test_member_details_against_mock_site():
+    site = MockSite(members=30, page_size=12)
+    server = start_mock_site(site)
+    try:
+        url = base_url(server)
+
+        async def crawl(engine):
+            rows = await engine.listing_rows(url + "memberlist")
+            return rows, await engine.member_details(rows, concurrency=4)
+
+        rows, fetched = run_engine(crawl)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert [row["data"][0] for row in rows] == [f"Member {index:05d}" for index in range(30)]
+    assert site.served["memberlist"] == 3
+    assert [row for row, _ in fetched] == rows
+    for (row, details), member in zip(fetched, site.members):
+        assert details[0] == member["phones"][0]
+        assert details[6] == url.replace("/en-AE/", f"/media/photo{member['id']}.png")
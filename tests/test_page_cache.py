@@ -0,0 +1,22 @@
+from bni_scraper.crawl_plan import memberlist_url
+from bni_scraper.page_cache import PageCache, cache_key
+
+
+def test_cache_key_matches_browser_encoding():
+    assert cache_key("https://x/memberlist?chapterCity=Business Bay&chapterArea=") == \
+        "https://x/memberlist?chapterCity=Business%20Bay&chapterArea="
+    # Existing escapes and reserved characters are kept
+    assert cache_key("https://x/memberdetails?encryptedMemberId=abc%3D%3D&a=1") == \
+        "https://x/memberdetails?encryptedMemberId=abc%3D%3D&a=1"
+
+
+def test_page_stored_by_browser_is_found_by_raw_url(tmp_path):
+    cache = PageCache(str(tmp_path / "cache.sqlite"))
+    try:
+        raw_url = memberlist_url("15090", "Abu Dubai", "2673", "https://bnicentraldubai.ae/en-AE/")
+        # Chromium's request.url, as install_page_cache stores it
+        cache.put(raw_url.replace(" ", "%20"), "<html>cached</html>")
+        entry = cache.get(raw_url)
+        assert entry is not None and entry.body == b"<html>cached</html>"
+    finally:
+        cache.close()